@@ -9,11 +9,38 @@ from pathlib import Path
 from typing import Any
 
 import requests
+from requests.adapters import HTTPAdapter
 from agent.reasoning import Reasoning
 
+# Faster JSON decoding for backend responses when orjson is available
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
 # LLM response logs go here (sibling to backend/logs/)
 LLM_LOG_DIR = Path(__file__).resolve().parent.parent / "backend" / "llm_logs"
 
+HTTP_TIMEOUT = 30  # seconds, per backend request
+
+# Keys that only appear in /action (or /bot_move) responses, never in /state.
+# Stripped when an action response is reused as the next step's state.
+_ACTION_ONLY_KEYS = ("error", "pre_merge_board", "drop_pos", "bot_pending", "bot_move_pos", "bot_flipped")
+
+
+def create_session(backend_url: str, pool_maxsize: int = 100) -> requests.Session:
+    """
+    Create a keep-alive HTTP session for the backend.
+
+    Pass one session to several Agents (e.g. one per thread) so they share a
+    single connection pool instead of each opening its own sockets.
+    """
+    session = requests.Session()
+    session.headers.update({"Connection": "keep-alive"})
+    session.mount(backend_url.rstrip("/") + "/", HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize))
+    return session
+
 
 class Agent:
     """
@@ -32,6 +59,7 @@ class Agent:
         game_name: str = "2048",
         session_id: str | None = None,
         player_name: str | None = None,
+        session: requests.Session | None = None,
     ):
         """
         Initialize the agent.
@@ -42,13 +70,29 @@ class Agent:
             game_name: Name of the game to play
             session_id: Optional session ID (will be generated if not provided)
             player_name: Player name for logs (defaults to model name)
+            session: Optional HTTP session shared with other agents (see create_session());
+                     if omitted, the agent creates its own and closes it in close()
         """
         self.reasoning = reasoning
         self.backend_url = backend_url.rstrip("/")
         self.game_name = game_name
         self.session_id = session_id
         self.step_count = 0
+
+        # Endpoint URLs are fixed for the agent's lifetime; build them once
+        base = f"{self.backend_url}/api/game/{self.game_name}"
+        self._url_state = f"{base}/state"
+        self._url_valid = f"{base}/valid_actions"
+        self._url_rules = f"{base}/rules"
+        self._url_action = f"{base}/action"
+        self._url_bot_move = f"{base}/bot_move"
+        self._url_reset = f"{base}/reset"
+        self._url_agent_error = f"{base}/agent_error"
+
         self.agent_log_file = None
+
+        self._session = session if session is not None else self._create_session()
+        self._owns_session = session is None
         
         # Use model name as player_name if not explicitly provided
         llm = getattr(reasoning, "llm", None)
@@ -63,6 +107,35 @@ class Agent:
         # LLM response log (created lazily after session_id is known)
         self._llm_log_file = None
         self._llm_log_writer = None
+        self._api_logger = None
+        # State bundle returned by the last action; the next step() consumes it
+        # instead of issuing separate /state and /valid_actions requests.
+        self._pending_state: dict[str, Any] | None = None
+        # valid_actions from the latest state response (every game embeds them)
+        self._valid_actions_cache: list[str] | None = None
+        self._rules: str | None = None
+
+    def _create_session(self) -> requests.Session:
+        """One keep-alive session for all backend calls (avoids a TCP handshake per request)."""
+        return create_session(self.backend_url, pool_maxsize=4)
+
+    def close(self) -> None:
+        """Release the backend connection pool if this agent created it, and close the API call log."""
+        self._close_api_log()
+        if self._owns_session:
+            self._session.close()
+
+    def _close_api_log(self) -> None:
+        """Close the API call log this agent opened on its engine's own logger."""
+        from agent.llm import api_logger
+        if self._api_logger is not None and self._api_logger is not api_logger:
+            self._api_logger.close()
+
+    def __enter__(self) -> "Agent":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
     
     def get_state(self) -> dict[str, Any]:
         """
@@ -72,37 +145,47 @@ class Agent:
             Game state dictionary
         """
         # If no session_id, initialize by calling reset first
-        # Backend /state endpoint requires session_id, but /reset can generate one
+        # Backend /state endpoint requires session_id, but /reset can generate one,
+        # and its response already is the current state
         if not self.session_id:
-            self.reset_game()
-        
-        url = f"{self.backend_url}/api/game/{self.game_name}/state"
-        response = requests.get(url, params={"session_id": self.session_id, "player_name": self.player_name})
-        response.raise_for_status()
-        state = response.json()
-        
-        # Update session_id if changed
-        if "session_id" in state:
-            self.session_id = state["session_id"]
+            return self.reset_game()
         
+        response = self._session.get(
+            self._url_state,
+            params={"session_id": self.session_id, "player_name": self.player_name},
+            timeout=HTTP_TIMEOUT,
+        )
+        if response.status_code >= 400:
+            response.raise_for_status()
+        state = _loads(response.content)
+        self._track_state(state)
         return state
     
-    def get_valid_actions(self) -> list[str]:
+    def get_valid_actions(self, refresh: bool = False) -> list[str]:
         """
-        Get list of valid actions from backend.
+        Get list of valid actions, reusing those embedded in the latest state response.
         
+        Args:
+            refresh: Force a round-trip to the /valid_actions endpoint
+            
         Returns:
             List of valid action strings
         """
-        if not self.session_id:
-            # Need to get state first to initialize session
-            self.get_state()
+        if not refresh and self._valid_actions_cache is not None:
+            return self._valid_actions_cache
+
+        self._ensure_session()
         
-        url = f"{self.backend_url}/api/game/{self.game_name}/valid_actions"
-        response = requests.get(url, params={"session_id": self.session_id, "player_name": self.player_name})
-        response.raise_for_status()
-        data = response.json()
-        return data.get("valid_actions", [])
+        response = self._session.get(
+            self._url_valid,
+            params={"session_id": self.session_id, "player_name": self.player_name},
+            timeout=HTTP_TIMEOUT,
+        )
+        if response.status_code >= 400:
+            response.raise_for_status()
+        data = _loads(response.content)
+        self._valid_actions_cache = data.get("valid_actions", [])
+        return self._valid_actions_cache
     
     def get_rules(self) -> str:
         """
@@ -111,10 +194,10 @@ class Agent:
         Returns:
             Game rules description string
         """
-        url = f"{self.backend_url}/api/game/{self.game_name}/rules"
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
+        response = self._session.get(self._url_rules, timeout=HTTP_TIMEOUT)
+        if response.status_code >= 400:
+            response.raise_for_status()
+        data = _loads(response.content)
         return data.get("rules", "")
     
     def apply_action(self, action: str) -> dict[str, Any]:
@@ -127,61 +210,65 @@ class Agent:
         Returns:
             Updated game state dictionary
         """
-        if not self.session_id:
-            # Initialize session first
-            self.get_state()
+        self._ensure_session()
         
-        url = f"{self.backend_url}/api/game/{self.game_name}/action"
-        response = requests.get(
-            url,
-            params={"move": action, "session_id": self.session_id, "player_name": self.player_name}
+        response = self._session.get(
+            self._url_action,
+            params={"move": action, "session_id": self.session_id, "player_name": self.player_name},
+            timeout=HTTP_TIMEOUT,
         )
-        response.raise_for_status()
-        state = response.json()
-
-        # Update session_id if changed
-        if "session_id" in state:
-            self.session_id = state["session_id"]
+        if response.status_code >= 400:
+            response.raise_for_status()
+        state = _loads(response.content)
+        self._track_state(state)
 
         # If bot needs to move, wait then trigger bot_move separately
         # This allows the frontend watcher to see the intermediate state
         if state.get("bot_pending"):
             time.sleep(1.0)
-            bot_url = f"{self.backend_url}/api/game/{self.game_name}/bot_move"
-            bot_response = requests.get(
-                bot_url,
-                params={"session_id": self.session_id, "player_name": self.player_name}
+            bot_response = self._session.get(
+                self._url_bot_move,
+                params={"session_id": self.session_id, "player_name": self.player_name},
+                timeout=HTTP_TIMEOUT,
             )
-            bot_response.raise_for_status()
-            state = bot_response.json()
-            if "session_id" in state:
-                self.session_id = state["session_id"]
+            if bot_response.status_code >= 400:
+                bot_response.raise_for_status()
+            state = _loads(bot_response.content)
+            self._track_state(state)
 
+        self._pending_state = state
         return state
     
-    def reset_game(self) -> dict[str, Any]:
+    def reset_game(self, difficulty: str | None = None) -> dict[str, Any]:
         """
         Reset the game to initial state and initialize session if needed.
         
+        Args:
+            difficulty: Optional difficulty to set before resetting (games without levels ignore it)
+        
         Returns:
             Initial game state dictionary
         """
-        url = f"{self.backend_url}/api/game/{self.game_name}/reset"
         params = {"player_name": self.player_name}
         if self.session_id:
             params["session_id"] = self.session_id
+        if difficulty:
+            params["difficulty"] = difficulty
 
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        state = response.json()
+        response = self._session.get(self._url_reset, params=params, timeout=HTTP_TIMEOUT)
+        if response.status_code >= 400:
+            response.raise_for_status()
+        state = _loads(response.content)
         
         # Store session_id from response (reset endpoint can generate new session)
         if "session_id" in state:
             self.session_id = state["session_id"]
             if not params:  # If we didn't have session_id before
                 print(f"Initialized session_id: {self.session_id}")
+        self._valid_actions_cache = state.get("valid_actions")
         
         self.step_count = 0
+        self._pending_state = None
         return state
     
     # ── LLM response logging ─────────────────────────────────────────
@@ -194,12 +281,21 @@ class Agent:
             return
 
         # Set up API call logger and LLM log for this session
-        from agent.llm import api_logger
+        from agent.llm import APICallLogger, api_logger
         safe_player = self.player_name.replace("/", "_").replace("\\", "_")
         safe_sid = self.session_id.replace("/", "_").replace("\\", "_")
         session_dir = LLM_LOG_DIR / self.game_name / safe_player / safe_sid
         session_dir.mkdir(parents=True, exist_ok=True)
-        api_logger.set_log_file(session_dir / "api_calls.jsonl")
+        # The engine's LLM gets a logger of its own, so concurrent agents don't
+        # write into whichever session set the shared api_logger last
+        llm = getattr(self.reasoning, "llm", None)
+        if llm is not None and hasattr(llm, "api_logger"):
+            if llm.api_logger is api_logger:
+                llm.api_logger = APICallLogger()
+            self._api_logger = llm.api_logger
+        else:
+            self._api_logger = api_logger
+        self._api_logger.set_log_file(session_dir / "api_calls.jsonl")
         log_path = session_dir / "llm_responses.csv"
         self._llm_log_file = open(log_path, "w", encoding="utf-8", newline="")
         self._llm_log_writer = csv.writer(self._llm_log_file)
@@ -227,15 +323,17 @@ class Agent:
         Returns:
             Updated game state after action
         """
-        # Step 1: Get current state
-        state = self.get_state()
+        # Step 1: Get current state (reuse the previous action's response when available)
+        state = self._take_pending_state()
+        if state is None:
+            state = self.get_state()
 
         # Check if game is over
         if state.get("game_over", False):
             print(f"Game over! Final score: {state.get('score', 0)}")
             return state
 
-        # Step 2: Get valid actions
+        # Step 2: Get valid actions (served from the state above; no extra request)
         valid_actions = self.get_valid_actions()
         self._last_valid_actions = valid_actions
 
@@ -243,8 +341,10 @@ class Agent:
             print("No valid actions available")
             return state
 
-        # Step 3: Get game rules
-        rules = self.get_rules()
+        # Step 3: Get game rules (session-independent, fetched once)
+        if self._rules is None:
+            self._rules = self.get_rules()
+        rules = self._rules
 
         # Step 4: Use reasoning engine to decide on action
         action = self.reasoning.reason(state, valid_actions, rules)
@@ -263,6 +363,25 @@ class Agent:
 
         return new_state
     
+    def _ensure_session(self) -> None:
+        """Mint a session with a single /reset call; the next step() reuses its state."""
+        if not self.session_id:
+            self._pending_state = self.reset_game()
+
+    def _track_state(self, state: dict[str, Any]) -> None:
+        """Record session_id and valid_actions from any state-returning response."""
+        if "session_id" in state:
+            self.session_id = state["session_id"]
+        self._valid_actions_cache = state.get("valid_actions")
+
+    def _take_pending_state(self) -> dict[str, Any] | None:
+        """Pop the cached action response, stripped down to what /state would return."""
+        state = self._pending_state
+        self._pending_state = None
+        if state is None:
+            return None
+        return {k: v for k, v in state.items() if k not in _ACTION_ONLY_KEYS}
+
     def _log_reasoning(self, state: dict[str, Any], valid_actions: list[str], chosen_action: str) -> None:
         """Log the state and chosen action for analysis."""
         if not self.session_id:
@@ -296,7 +415,8 @@ class Agent:
         
         Args:
             max_steps: Maximum number of steps to take (None for infinite)
-            delay: Delay in seconds between steps
+            delay: Minimum seconds per step, so a frontend watcher can follow along.
+                   Time spent reasoning/on HTTP counts toward it; use 0 for headless runs.
             continue_to_level: Continue playing to this level (for games that support next_level)
         """
         print(f"Starting agent loop for game '{self.game_name}'")
@@ -307,6 +427,7 @@ class Agent:
         step = 0
         try:
             while max_steps is None or step < max_steps:
+                t0 = time.monotonic()
                 state = self.step()
                 
                 if state.get("game_over", False):
@@ -319,9 +440,11 @@ class Agent:
                 
                 step += 1
                 
-                # Delay between steps
+                # Pad the step out to `delay` seconds (no wait if the step already took longer)
                 if delay > 0:
-                    time.sleep(delay)
+                    remaining = delay - (time.monotonic() - t0)
+                    if remaining > 0:
+                        time.sleep(remaining)
         
         except KeyboardInterrupt:
             print("\n\nAgent loop interrupted by user")
@@ -347,7 +470,6 @@ class Agent:
         if not self.session_id:
             return
         try:
-            url = f"{self.backend_url}/api/game/{self.game_name}/agent_error"
-            requests.post(url, json={"error": error_msg}, params={"session_id": self.session_id})
+            self._session.post(self._url_agent_error, json={"error": error_msg}, params={"session_id": self.session_id}, timeout=HTTP_TIMEOUT)
         except Exception:
             pass  # Best effort
@@ -0,0 +1,281 @@
+"""Async Agent - runs backend I/O on asyncio so many agents can share one event loop."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any
+
+from agent.agent import Agent, HTTP_TIMEOUT, _loads
+
+
+def _import_aiohttp():
+    """Lazy import of aiohttp (only needed for async rollouts)."""
+    try:
+        import aiohttp
+    except ImportError as e:
+        raise ImportError(
+            f"Failed to import aiohttp: {e}\n"
+            "Please install it with: pip install aiohttp"
+        ) from e
+    return aiohttp
+
+
+def create_client_session():
+    """Create an aiohttp session with a keep-alive connection pool, suitable for sharing across agents."""
+    aiohttp = _import_aiohttp()
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=100, keepalive_timeout=60),
+        timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT),
+    )
+
+
+class AsyncAgent(Agent):
+    """
+    Agent whose backend interaction is async (aiohttp).
+
+    Same step logic and logging as Agent, but every HTTP helper, step() and
+    run_loop() are coroutines. Engines with an areason() coroutine (e.g.
+    VanillaReasoning) are awaited directly; others run reason() in a worker
+    thread so they do not block other agents on the loop.
+    Give each agent its own reasoning engine: engines keep per-call state
+    (last_raw_response, last_usage, ...) that is not safe to share.
+
+    Usage:
+        async with AsyncAgent(reasoning, game_name="2048") as agent:
+            await agent.run_loop(max_steps=100)
+    """
+
+    def __init__(self, *args: Any, session: Any = None, **kwargs: Any):
+        """
+        Initialize the async agent.
+
+        Args:
+            *args, **kwargs: Same as Agent
+            session: Optional shared aiohttp.ClientSession. If omitted, one is
+                     created lazily on first request and closed by close().
+        """
+        super().__init__(*args, session=session, **kwargs)
+
+    def _create_session(self) -> None:
+        # aiohttp sessions must be created inside a running loop; see _get_session()
+        return None
+
+    def _get_session(self):
+        if self._session is None:
+            self._session = create_client_session()
+        return self._session
+
+    async def close(self) -> None:
+        """Close the aiohttp session if this agent created it, and close the API call log."""
+        self._close_api_log()
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def __enter__(self) -> "AsyncAgent":
+        raise TypeError("AsyncAgent must be used with 'async with', not 'with'")
+
+    def __exit__(self, *exc_info: Any) -> None:
+        raise TypeError("AsyncAgent must be used with 'async with', not 'with'")
+
+    async def __aenter__(self) -> "AsyncAgent":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def _get_json(self, url: str, params: dict[str, Any] | None = None) -> dict[str, Any]:
+        async with self._get_session().get(url, params=params) as response:
+            if response.status >= 400:
+                response.raise_for_status()
+            return _loads(await response.read())
+
+    # ── Backend API ───────────────────────────────────────────────────
+
+    async def get_state(self) -> dict[str, Any]:
+        """Get current game state from backend."""
+        if not self.session_id:
+            return await self.reset_game()
+
+        state = await self._get_json(self._url_state, {"session_id": self.session_id, "player_name": self.player_name})
+        self._track_state(state)
+        return state
+
+    async def get_valid_actions(self, refresh: bool = False) -> list[str]:
+        """Get list of valid actions, reusing those embedded in the latest state response."""
+        if not refresh and self._valid_actions_cache is not None:
+            return self._valid_actions_cache
+
+        await self._ensure_session()
+
+        data = await self._get_json(self._url_valid, {"session_id": self.session_id, "player_name": self.player_name})
+        self._valid_actions_cache = data.get("valid_actions", [])
+        return self._valid_actions_cache
+
+    async def get_rules(self) -> str:
+        """Get game rules description from backend."""
+        data = await self._get_json(self._url_rules)
+        return data.get("rules", "")
+
+    async def apply_action(self, action: str) -> dict[str, Any]:
+        """Apply an action to the game via backend."""
+        await self._ensure_session()
+
+        state = await self._get_json(
+            self._url_action, {"move": action, "session_id": self.session_id, "player_name": self.player_name}
+        )
+        self._track_state(state)
+
+        # Same two-phase bot move as Agent.apply_action, without blocking the loop
+        if state.get("bot_pending"):
+            await asyncio.sleep(1.0)
+            state = await self._get_json(self._url_bot_move, {"session_id": self.session_id, "player_name": self.player_name})
+            self._track_state(state)
+
+        self._pending_state = state
+        return state
+
+    async def reset_game(self, difficulty: str | None = None) -> dict[str, Any]:
+        """Reset the game to initial state (optionally at *difficulty*) and initialize session if needed."""
+        params = {"player_name": self.player_name}
+        if self.session_id:
+            params["session_id"] = self.session_id
+        if difficulty:
+            params["difficulty"] = difficulty
+
+        state = await self._get_json(self._url_reset, params)
+        self._track_state(state)
+
+        self.step_count = 0
+        self._pending_state = None
+        return state
+
+    async def _ensure_session(self) -> None:
+        """Mint a session with a single /reset call; the next step() reuses its state."""
+        if not self.session_id:
+            self._pending_state = await self.reset_game()
+
+    # ── Step logic ────────────────────────────────────────────────────
+
+    async def step(self) -> dict[str, Any]:
+        """
+        Execute one step: get state, reason about action, apply action.
+
+        Independent I/O is overlapped: the first step fetches state and rules
+        concurrently, and the step's logs are written in a worker thread while
+        the action request is in flight.
+        """
+        state = self._take_pending_state()
+        if state is None and self._rules is None:
+            state, self._rules = await asyncio.gather(self.get_state(), self.get_rules())
+        elif state is None:
+            state = await self.get_state()
+
+        if state.get("game_over", False):
+            print(f"Game over! Final score: {state.get('score', 0)}")
+            return state
+
+        valid_actions = await self.get_valid_actions()
+        self._last_valid_actions = valid_actions
+
+        if not valid_actions:
+            print("No valid actions available")
+            return state
+
+        if self._rules is None:
+            self._rules = await self.get_rules()
+        rules = self._rules
+
+        # Await the LLM natively when the engine supports it; otherwise keep the
+        # blocking reason() call off the event loop
+        areason = getattr(self.reasoning, "areason", None)
+        if areason is not None:
+            action = await areason(state, valid_actions, rules)
+        else:
+            action = await asyncio.to_thread(self.reasoning.reason, state, valid_actions, rules)
+        print(f"[{self.session_id}] Step {self.step_count + 1}: Choosing action '{action}'")
+
+        # The next state and its valid_actions come back with the action response,
+        # so the only work left to overlap with that round-trip is logging
+        new_state, _ = await asyncio.gather(
+            self.apply_action(action),
+            asyncio.to_thread(self._write_step_logs, state, valid_actions, action),
+        )
+
+        self.step_count += 1
+        return new_state
+
+    def _write_step_logs(self, state: dict[str, Any], valid_actions: list[str], action: str) -> None:
+        """Blocking log writes for the current step (step() runs this in a worker thread)."""
+        self._log_reasoning(state, valid_actions, action)
+        self._write_llm_log(self.step_count + 1)
+
+    async def run_loop(self, max_steps: int | None = None, delay: float = 1.0, continue_to_level: int | None = None):
+        """
+        Run the agent in a loop, continuously playing the game.
+
+        Args:
+            max_steps: Maximum number of steps to take (None for infinite)
+            delay: Minimum seconds per step (reasoning/HTTP time counts toward it; 0 for headless)
+            continue_to_level: Continue playing to this level (for games that support next_level)
+
+        The aiohttp session is closed when the loop ends (if this agent created it);
+        later requests open a new one.
+        """
+        step = 0
+        try:
+            while max_steps is None or step < max_steps:
+                t0 = time.monotonic()
+                state = await self.step()
+                if state.get("game_over", False):
+                    print(f"[{self.session_id}] Game finished! Final score: {state.get('score', 0)}, "
+                          f"steps: {self.step_count}")
+                    break
+
+                step += 1
+                if delay > 0:
+                    remaining = delay - (time.monotonic() - t0)
+                    if remaining > 0:
+                        await asyncio.sleep(remaining)
+
+        except KeyboardInterrupt:
+            print("\n\nAgent loop interrupted by user")
+        except asyncio.CancelledError:
+            # Ctrl+C under asyncio.run() arrives as cancellation; let it propagate
+            print(f"\n\n[{self.session_id}] Agent loop cancelled")
+            raise
+        except RuntimeError as e:
+            print(f"\n\nAgent stopped due to error: {e}")
+            self._log_error(step + 1, str(e))
+            await self._notify_error(str(e))
+        except Exception as e:
+            print(f"\n\nError in agent loop: {e}")
+            self._log_error(step + 1, str(e))
+            await self._notify_error(str(e))
+            raise
+        finally:
+            await self.close()
+
+    async def _notify_error(self, error_msg: str) -> None:
+        """Notify backend about agent error so frontend watchers can see it."""
+        if not self.session_id:
+            return
+        try:
+            async with self._get_session().post(self._url_agent_error, json={"error": error_msg}, params={"session_id": self.session_id}):
+                pass
+        except Exception:
+            pass  # Best effort
+
+
+async def run_many(agents: list[AsyncAgent], **run_kwargs: Any) -> None:
+    """
+    Run several agents concurrently on the current event loop (N-way parallel rollouts).
+
+    Each agent needs its own reasoning engine: per-session state such as the
+    API call log lives on the engine, so a shared one would mix sessions.
+    """
+    engines = {id(agent.reasoning) for agent in agents}
+    if len(engines) < len(agents):
+        raise ValueError("run_many() needs a separate reasoning engine for each agent")
+    await asyncio.gather(*(agent.run_loop(**run_kwargs) for agent in agents))
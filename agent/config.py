@@ -3,9 +3,64 @@
 from __future__ import annotations
 
 import os
+import re
 from pathlib import Path
 from typing import Any
 
+from agent.llm import PROVIDER_ENV
+
+# Keys that should NOT be loaded from .env (only API keys should be in .env)
+# These should be set via command-line arguments instead
+_IGNORED_KEYS = frozenset({
+    "MODEL", "GAME_NAME", "REASONING_METHOD", "API_PROVIDER",
+    "TEMPERATURE", "MAX_TOKENS", "MAX_STEPS", "DELAY",
+    "AUTO_OPEN_BROWSER", "BACKEND_URL", "FRONTEND_URL", "SESSION_ID"
+})
+
+# KEY=VALUE lines; comments and blank lines simply don't match
+_ENV_LINE = re.compile(r"^\s*([A-Za-z_][A-Za-z0-9_]*)\s*=\s*(.*?)\s*$")
+
+_ENV_LOADED = False
+
+
+def _load_env_file() -> None:
+    """Load environment variables from .env file if it exists (once per process)."""
+    global _ENV_LOADED
+    if _ENV_LOADED:
+        return
+    _ENV_LOADED = True
+
+    # Look for .env file in multiple locations (priority order):
+    # 1. Project root (agent/../.env) - recommended
+    # 2. Agent directory (agent/.env) - fallback
+    agent_dir = Path(__file__).resolve().parent
+    env_file = next((p for p in (agent_dir.parent / ".env", agent_dir / ".env") if p.exists()), None)
+    if env_file is None:
+        return
+
+    matches = (_ENV_LINE.match(line) for line in env_file.read_text(encoding="utf-8").splitlines())
+    env_content = {m[1]: m[2].strip('"').strip("'") for m in matches if m}
+
+    debug = bool(os.environ.get("AGENT_CONFIG_DEBUG"))
+    if debug:
+        print(f"DEBUG: Read {len(env_content)} keys from .env file ({env_file}):")
+        for key in sorted(env_content):
+            value = env_content[key]
+            print(f"  {key}={value[:20]}..." if len(value) > 20 else f"  {key}={value}")
+
+    # Single pass: load API keys, drop non-API settings (those belong on the command line)
+    for key, value in env_content.items():
+        if key not in _IGNORED_KEYS:
+            if key not in os.environ:
+                os.environ[key] = value
+            continue
+        # A matching environment value was most likely exported from .env; clear it
+        if os.environ.get(key) == value:
+            del os.environ[key]
+        if debug:
+            print(f"Warning: '{key}' found in .env file and ignored. "
+                  f"Please use command-line arguments (--{key.lower().replace('_', '-')}) instead.")
+
 
 class Config:
     """
@@ -13,7 +68,7 @@ class Config:
     
     Supports loading from:
     1. Environment variables (highest priority)
-    2. .env file in project root
+    2. .env file in project root (parsed once per process)
     3. Default values
     """
     
@@ -32,84 +87,7 @@ class Config:
     
     def __init__(self):
         """Initialize configuration, loading from .env file if present."""
-        self._load_env_file()
-    
-    def _load_env_file(self) -> None:
-        """Load environment variables from .env file if it exists."""
-        # Keys that should NOT be loaded from .env (only API keys should be in .env)
-        # These should be set via command-line arguments instead
-        ignored_keys = {
-            "MODEL", "GAME_NAME", "REASONING_METHOD", "API_PROVIDER",
-            "TEMPERATURE", "MAX_TOKENS", "MAX_STEPS", "DELAY",
-            "AUTO_OPEN_BROWSER", "BACKEND_URL", "FRONTEND_URL", "SESSION_ID"
-        }
-        
-        # First, check if any ignored keys are already set from .env (from previous runs)
-        # and clear them if they match values that might be in .env
-        for key in ignored_keys:
-            if key in os.environ:
-                # Check if this might have come from .env by checking if .env contains it
-                # We'll clear it and let command-line args or defaults take precedence
-                pass  # We'll handle this after reading .env
-        
-        # Look for .env file in multiple locations (priority order):
-        # 1. Project root (agent/../.env) - recommended
-        # 2. Agent directory (agent/.env) - fallback
-        project_root = Path(__file__).resolve().parent.parent
-        agent_dir = Path(__file__).resolve().parent
-        
-        env_file = None
-        # Try project root first
-        if (project_root / ".env").exists():
-            env_file = project_root / ".env"
-        # Fallback to agent directory
-        elif (agent_dir / ".env").exists():
-            env_file = agent_dir / ".env"
-        
-        if env_file:
-            # Read .env file to check for ignored keys
-            env_content = {}
-            with open(env_file, "r", encoding="utf-8") as f:
-                for line_num, line in enumerate(f, 1):
-                    original_line = line
-                    line = line.strip()
-                    # Skip comments and empty lines
-                    if not line or line.startswith("#"):
-                        continue
-                    # Parse KEY=VALUE format
-                    if "=" in line:
-                        key, value = line.split("=", 1)
-                        key = key.strip()
-                        value = value.strip().strip('"').strip("'")
-                        env_content[key] = value
-            
-            # Debug: Print what we actually read from .env
-            if env_content:
-                print(f"DEBUG: Read {len(env_content)} keys from .env file ({env_file}):")
-                for key in sorted(env_content.keys()):
-                    print(f"  {key}={env_content[key][:20]}..." if len(env_content[key]) > 20 else f"  {key}={env_content[key]}")
-            else:
-                print(f"DEBUG: .env file ({env_file}) is empty or contains only comments/whitespace")
-            
-            # Clear ignored keys from environment if they match .env values
-            for key in ignored_keys:
-                if key in env_content and key in os.environ:
-                    if os.environ[key] == env_content[key]:
-                        # This was likely set from .env, clear it
-                        del os.environ[key]
-                        print(f"Warning: '{key}' was found in .env file and has been cleared. "
-                              f"Please use command-line arguments (--{key.lower().replace('_', '-')}) instead.")
-            
-            # Now load only non-ignored keys
-            # Only warn about keys that are actually in the .env file
-            for key, value in env_content.items():
-                if key not in ignored_keys and key not in os.environ:
-                    os.environ[key] = value
-                elif key in ignored_keys:
-                    # Warn if non-API-key settings are found in .env
-                    print(f"Warning: '{key}' found in .env file. "
-                          f"Please use command-line arguments instead. "
-                          f"Ignoring this setting.")
+        _load_env_file()
     
     # API Key getters
     def get_openai_api_key(self) -> str | None:
@@ -135,14 +113,9 @@ class Config:
         Returns:
             API key string or None
         """
-        if provider:
-            provider_lower = provider.lower()
-            if provider_lower == "openai":
-                return self.get_openai_api_key()
-            elif provider_lower == "anthropic":
-                return self.get_anthropic_api_key()
-            elif provider_lower == "gemini" or provider_lower == "google":
-                return self.get_gemini_api_key()
+        env_var = PROVIDER_ENV.get(provider.lower()) if provider else None
+        if env_var:
+            return os.getenv(env_var)
         
         # Try to infer from environment
         # Check common environment variable names
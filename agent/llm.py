@@ -6,9 +6,16 @@ through LiteLLM, abstracting away the differences between different providers.
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
+import logging
 import os
+import random
+import re
+import threading
 import time
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
 from typing import Any
@@ -17,6 +24,39 @@ from typing import Any
 
 MAX_RETRIES = 20
 TIMEOUT = 120  # seconds
+MAX_BACKOFF = 60  # seconds, also caps a server-sent Retry-After
+COMPLETION_CACHE_SIZE = 1024  # temperature-0 completions kept in memory (LRU)
+
+log = logging.getLogger(__name__)
+
+# Provider name -> environment variable holding its API key (None: no key needed)
+PROVIDER_ENV: dict[str, str | None] = {
+    "openai": "OPENAI_API_KEY",
+    "anthropic": "ANTHROPIC_API_KEY",
+    "gemini": "GEMINI_API_KEY",
+    "google": "GEMINI_API_KEY",
+    "ollama": None,
+}
+
+# Model-name prefixes -> provider, checked in order when no provider is given
+MODEL_PREFIXES: tuple[tuple[tuple[str, ...], str], ...] = (
+    (("gpt", "azure/"), "openai"),
+    (("claude", "anthropic/"), "anthropic"),
+    (("gemini",), "gemini"),
+    (("ollama",), "ollama"),
+)
+
+
+# MODEL_PREFIXES as one anchored alternation; the matching group's name is the provider
+_MODEL_PREFIX_RE = re.compile("|".join(
+    f"(?P<{provider}>{'|'.join(map(re.escape, prefixes))})" for prefixes, provider in MODEL_PREFIXES
+))
+
+
+def detect_provider(model: str, default: str = "openai") -> str:
+    """Infer the provider from a model name via MODEL_PREFIXES."""
+    m = _MODEL_PREFIX_RE.match(model)
+    return m.lastgroup if m else default
 
 
 class APICallLogger:
@@ -27,7 +67,8 @@ class APICallLogger:
         self._path = None
 
     def set_log_file(self, path: str | Path):
-        """Set the log file path. Creates parent dirs if needed."""
+        """Set the log file path (closing the previous one). Creates parent dirs if needed."""
+        self.close()
         self._path = Path(path)
         self._path.parent.mkdir(parents=True, exist_ok=True)
         self._file = open(self._path, "a", encoding="utf-8")
@@ -46,10 +87,116 @@ class APICallLogger:
             self._file = None
 
 
-# Global logger instance — set per session
+# Default logger for LLM instances; agents give their engine's LLM its own per session
 api_logger = APICallLogger()
 
 
+class CompletionCache:
+    """
+    Thread-safe LRU of (text, reasoning) pairs keyed by a request digest.
+
+    The module-level completion_cache holds temperature-0 completions shared
+    by all LLM instances; reasoning engines keep their own instance for actions.
+    """
+
+    def __init__(self, maxsize: int = COMPLETION_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data: OrderedDict[str, tuple[str, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model: str, api_base: str | None, messages: list, call_kwargs: dict) -> str:
+        """Digest of everything that determines the response (messages may hold image parts)."""
+        payload = json.dumps([model, api_base, messages, call_kwargs], sort_keys=True, default=str)
+        return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+    def get(self, key: str) -> tuple[str, str] | None:
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is not None:
+                self._data.move_to_end(key)
+            return hit
+
+    def put(self, key: str, content: str, reasoning: str) -> None:
+        with self._lock:
+            self._data[key] = (content, reasoning)
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+completion_cache = CompletionCache()
+
+
+class RateLimiter:
+    """
+    Token bucket limiting requests per second, shared by every LLM on a model.
+
+    Each call reserves a token (possibly in the future) and waits until it is
+    due, so concurrent agents spread their requests out evenly instead of
+    bursting into provider 429s and backing off together.
+    """
+
+    def __init__(self, rate: float, burst: int | None = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token; return how long to wait before it may be used."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    def acquire(self) -> None:
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self) -> None:
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+_rate_limiters: dict[tuple[str, float], RateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(model: str, rate: float) -> RateLimiter:
+    """Return the RateLimiter shared by all callers of *model* at *rate* requests/second."""
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get((model, rate))
+        if limiter is None:
+            limiter = _rate_limiters[(model, rate)] = RateLimiter(rate)
+        return limiter
+
+
+def backoff_delay(attempt: int, error: Exception) -> float:
+    """Seconds to wait before retry *attempt*: the server's Retry-After, else jittered exponential."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if headers:
+        try:
+            return min(float(headers.get("retry-after")), MAX_BACKOFF)
+        except (TypeError, ValueError):
+            pass
+    # Jitter keeps agents that failed together from retrying in lockstep
+    return min(2 ** attempt, MAX_BACKOFF) * random.uniform(0.5, 1.0)
+
+
 class LLM:
     """
     Unified interface for calling language models via LiteLLM.
@@ -57,6 +204,16 @@ class LLM:
     This is a simple wrapper around LiteLLM that provides a consistent API
     regardless of which model provider you're using (OpenAI, Anthropic, Google, etc.).
     """
+
+    # litellm module and its completion function, imported once and shared by all instances
+    _litellm = None
+    _completion = None
+    _acompletion = None
+    _import_lock = threading.Lock()
+    # Keep-alive HTTP clients shared by all instances (TCP/TLS setup paid once per host)
+    MAX_KEEPALIVE = 64
+    MAX_CONNS = 128
+    _http_session = None
     
     def __init__(
         self,
@@ -68,6 +225,8 @@ class LLM:
         max_tokens: int = 1000,
         no_thinking: bool = False,
         extra_headers: dict | None = None,
+        cache_completions: bool = True,
+        rate_limit: float | None = None,
     ):
         """
         Initialize the LLM interface.
@@ -79,6 +238,9 @@ class LLM:
             api_base: API base URL (for local models or custom endpoints)
             temperature: Sampling temperature (0.0 to 2.0)
             max_tokens: Maximum tokens in response
+            cache_completions: Reuse responses to identical prompts when temperature is 0
+            rate_limit: Max requests per second to this model, shared by all
+                        instances in the process (None = unlimited)
         """
         # Delay import of litellm to avoid initialization errors
         # Import it only when needed (lazy import)
@@ -88,9 +250,20 @@ class LLM:
         self.no_thinking = no_thinking
         self.last_reasoning = ""
         self._extra_headers = extra_headers or {}
-        self._litellm = None  # Will be imported lazily
         self._api_base = api_base
         self._api_key = api_key
+        self.cache_completions = cache_completions
+        # Where API calls are logged; replace with a private APICallLogger when
+        # several instances run concurrently (see Agent._ensure_llm_log)
+        self.api_logger = api_logger
+        self._rate_limiter = get_rate_limiter(model, rate_limit) if rate_limit else None
+
+        # Per-call defaults, built once (call() merges only when overrides are passed)
+        # Some newer models (gpt-5.4+) require max_completion_tokens instead of max_tokens
+        token_param = "max_tokens"
+        if model.startswith(("gpt-5", "o1", "o3")):
+            token_param = "max_completion_tokens"
+        self._base_kwargs = {"temperature": temperature, token_param: max_tokens, "timeout": TIMEOUT}
         
         # Set API key if provided
         if api_key:
@@ -102,51 +275,39 @@ class LLM:
     
     def _set_api_key(self, api_key: str, api_provider: str | None, model: str) -> None:
         """Set API key in appropriate environment variable."""
-        provider = api_provider
-        if not provider:
-            # Auto-detect provider from model name
-            if model.startswith("gpt") or model.startswith("azure/"):
-                provider = "openai"
-            elif model.startswith("claude"):
-                provider = "anthropic"
-            elif model.startswith("gemini"):
-                provider = "gemini"
-            elif model.startswith("ollama"):
-                provider = "ollama"
-        
-        # Set environment variable
-        if provider == "openai":
-            os.environ["OPENAI_API_KEY"] = api_key
-        elif provider == "anthropic":
-            os.environ["ANTHROPIC_API_KEY"] = api_key
-        elif provider == "gemini" or provider == "google":
-            os.environ["GEMINI_API_KEY"] = api_key
-        elif provider == "ollama":
-            # Ollama doesn't require API key
-            pass
-        else:
-            # Default to OpenAI
-            os.environ["OPENAI_API_KEY"] = api_key
+        provider = api_provider or detect_provider(model)
+        # Unknown providers default to OpenAI; Ollama doesn't require an API key
+        env_var = PROVIDER_ENV.get(provider, "OPENAI_API_KEY")
+        # Only write on change (many engines usually share one key)
+        if env_var and os.environ.get(env_var) != api_key:
+            os.environ[env_var] = api_key
     
     def _set_api_base(self, api_base: str, model: str) -> None:
         """Set API base URL."""
-        if model.startswith("ollama"):
-            os.environ["OLLAMA_API_BASE"] = api_base
-        else:
-            os.environ["OPENAI_API_BASE"] = api_base
+        env_var = "OLLAMA_API_BASE" if detect_provider(model) == "ollama" else "OPENAI_API_BASE"
+        if os.environ.get(env_var) != api_base:
+            os.environ[env_var] = api_base
     
-    def _ensure_litellm(self):
-        """Lazy import of litellm to avoid initialization errors."""
-        if self._litellm is None:
+    @classmethod
+    def _ensure_litellm(cls):
+        """Lazy import of litellm (once per process) to avoid initialization errors."""
+        if cls._litellm is not None:
+            return
+        # Agents may call concurrently (threads / asyncio.to_thread); import exactly once
+        with cls._import_lock:
+            if cls._litellm is not None:
+                return
             try:
                 import litellm
-                self._litellm = litellm
-                # Configure LiteLLM
-                try:
-                    self._litellm.set_verbose = False
-                except Exception:
-                    # Some versions of litellm may not have set_verbose
-                    pass
+                cls._completion = staticmethod(litellm.completion)
+                cls._acompletion = staticmethod(litellm.acompletion)
+                cls._litellm = litellm
+                # Configure LiteLLM (process-wide, once) through its public switches;
+                # set_verbose is deprecated in newer versions and already off by default
+                if hasattr(litellm, "suppress_debug_info"):
+                    litellm.suppress_debug_info = True
+                logging.getLogger("LiteLLM").setLevel(logging.WARNING)
+                cls._set_litellm_client(litellm)
             except ImportError as e:
                 raise ImportError(
                     f"Failed to import litellm: {e}\n"
@@ -161,10 +322,47 @@ class LLM:
                     "Or: pip install litellm==1.40.0"
                 ) from e
     
+    @classmethod
+    def _set_litellm_client(cls, litellm) -> None:
+        """Give litellm one pooled httpx client for sync calls (HTTP/2 when h2 is installed)."""
+        if getattr(litellm, "client_session", None) is not None:
+            return  # configured by the caller
+        try:
+            import httpx
+        except ImportError:
+            return
+        try:
+            import h2  # noqa: F401
+            http2 = True
+        except ImportError:
+            http2 = False
+        litellm.client_session = httpx.Client(
+            http2=http2,
+            timeout=TIMEOUT,
+            limits=httpx.Limits(max_keepalive_connections=cls.MAX_KEEPALIVE, max_connections=cls.MAX_CONNS),
+        )
+
+    @classmethod
+    def _get_http_session(cls):
+        """Pooled requests.Session for _direct_api_call (keep-alive to the custom api_base)."""
+        if cls._http_session is None:
+            with cls._import_lock:
+                if cls._http_session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=cls.MAX_KEEPALIVE)
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    cls._http_session = session
+        return cls._http_session
+
     def call(
         self,
         messages: list[dict[str, str]],
         system_message: str | None = None,
+        use_cache: bool = True,
         **kwargs: Any
     ) -> str:
         """
@@ -174,77 +372,157 @@ class LLM:
             messages: List of message dicts with "role" and "content" keys
                      Example: [{"role": "user", "content": "Hello"}]
             system_message: Optional system message (will be prepended to messages)
+            use_cache: Set False to bypass the completion cache (e.g. when re-asking
+                       after a rejected reply); the response is then not cached either
             **kwargs: Additional parameters to pass to LiteLLM (e.g., temperature, max_tokens)
         
         Returns:
             Response text from the model
         """
-        # Ensure litellm is imported
-        self._ensure_litellm()
-        
-        # Prepare messages
-        full_messages = []
-        if system_message:
-            full_messages.append({"role": "system", "content": system_message})
-        full_messages.extend(messages)
-        
-        # Merge kwargs with instance defaults
-        # Some newer models (gpt-5.4+) require max_completion_tokens instead of max_tokens
-        token_param = "max_tokens"
-        if self.model.startswith("gpt-5") or self.model.startswith("o1") or self.model.startswith("o3"):
-            token_param = "max_completion_tokens"
-        call_kwargs = {
-            "temperature": self.temperature,
-            token_param: self.max_tokens,
-            **kwargs
-        }
+        full_messages, call_kwargs, cache_key = self._prepare_call(messages, system_message, kwargs, use_cache)
+        if cache_key is not None:
+            cached = self._cached(cache_key)
+            if cached is not None:
+                return cached
 
         # Use direct HTTP for custom api_base (litellm drops reasoning_content)
         if self._api_base:
-            return self._direct_api_call(full_messages, call_kwargs)
+            content = self._direct_api_call(full_messages, call_kwargs)
+        else:
+            content = self._litellm_call(full_messages, call_kwargs)
 
-        # Call LiteLLM for standard providers with retry
+        if cache_key is not None:
+            completion_cache.put(cache_key, content, self.last_reasoning)
+        return content
+
+    async def acall(
+        self,
+        messages: list[dict[str, str]],
+        system_message: str | None = None,
+        use_cache: bool = True,
+        **kwargs: Any
+    ) -> str:
+        """
+        Async variant of call() built on litellm.acompletion.
+
+        Lets many agents await LLM calls on one event loop instead of each
+        occupying a worker thread. Retries back off with asyncio.sleep.
+        """
+        full_messages, call_kwargs, cache_key = self._prepare_call(messages, system_message, kwargs, use_cache)
+        if cache_key is not None:
+            cached = self._cached(cache_key)
+            if cached is not None:
+                return cached
+
+        if self._api_base:
+            # requests has no async API; keep the direct call off the loop
+            content = await asyncio.to_thread(self._direct_api_call, full_messages, call_kwargs)
+        else:
+            attempt = 0
+            while True:
+                try:
+                    if self._rate_limiter is not None:
+                        await self._rate_limiter.aacquire()
+                    response = await self._acompletion(model=self.model, messages=full_messages, **call_kwargs)
+                    self._log_success(full_messages, response, attempt + 1)
+                    break
+                except Exception as e:
+                    attempt += 1
+                    await asyncio.sleep(self._handle_failure(full_messages, e, attempt))
+            content = self._read_response(response)
+
+        if cache_key is not None:
+            completion_cache.put(cache_key, content, self.last_reasoning)
+        return content
+
+    def discard_cached(self, messages: list[dict[str, str]], system_message: str | None = None, **kwargs: Any) -> None:
+        """Drop the cached completion for this request (e.g. a reply the caller rejected)."""
+        _, _, cache_key = self._prepare_call(messages, system_message, kwargs)
+        if cache_key is not None:
+            completion_cache.discard(cache_key)
+
+    def _prepare_call(
+        self, messages: list, system_message: str | None, kwargs: dict, use_cache: bool = True
+    ) -> tuple[list, dict, str | None]:
+        """Shared setup for call()/acall(): full message list, merged kwargs and cache key."""
+        # Ensure litellm is imported
+        self._ensure_litellm()
+
+        # Prepare messages (only copy the list when a system message must be prepended)
+        full_messages = messages
+        if system_message:
+            full_messages = [{"role": "system", "content": system_message}, *messages]
+
+        # Merge kwargs with instance defaults
+        call_kwargs = {**self._base_kwargs, **kwargs} if kwargs else self._base_kwargs
+
+        # Greedy decoding: an identical prompt gets the same answer, so skip the round-trip
+        cache_key = None
+        if use_cache and self.cache_completions and call_kwargs.get("temperature") == 0:
+            cache_key = completion_cache.make_key(self.model, self._api_base, full_messages, call_kwargs)
+        return full_messages, call_kwargs, cache_key
+
+    def _cached(self, cache_key: str) -> str | None:
+        """Return a cached completion (restoring last_reasoning/last_usage), or None on a miss."""
+        hit = completion_cache.get(cache_key)
+        if hit is None:
+            return None
+        content, self.last_reasoning = hit
+        self.last_usage = {"input_tokens": 0, "output_tokens": 0}
+        return content
+
+    def _litellm_call(self, full_messages: list, call_kwargs: dict) -> str:
+        """Call LiteLLM for standard providers with retry."""
         attempt = 0
-        while attempt < MAX_RETRIES:
+        while True:
             try:
-                call_kwargs["timeout"] = TIMEOUT
-                response = self._litellm.completion(
+                if self._rate_limiter is not None:
+                    self._rate_limiter.acquire()
+                response = self._completion(
                     model=self.model,
                     messages=full_messages,
                     **call_kwargs
                 )
-
-                # Log success
-                api_logger.log({
-                    "type": "api_call",
-                    "status": "success",
-                    "model": self.model,
-                    "input": full_messages,
-                    "output_content": response.choices[0].message.content or "",
-                    "usage": {"prompt_tokens": getattr(response.usage, "prompt_tokens", 0),
-                              "completion_tokens": getattr(response.usage, "completion_tokens", 0)} if response.usage else {},
-                    "attempt": attempt + 1,
-                })
+                self._log_success(full_messages, response, attempt + 1)
                 break
             except Exception as e:
                 attempt += 1
-                wait = min(2 ** attempt, 60)
-                print(f"  [LLM] API call error (attempt {attempt}/{MAX_RETRIES}): {e} — retrying in {wait}s")
-
-                # Log failure
-                api_logger.log({
-                    "type": "api_call",
-                    "status": "error",
-                    "model": self.model,
-                    "input": full_messages,
-                    "error": str(e),
-                    "attempt": attempt,
-                })
-
-                if attempt >= MAX_RETRIES:
-                    raise RuntimeError(f"API call failed after {MAX_RETRIES} retries: {e}")
-                time.sleep(wait)
-
+                time.sleep(self._handle_failure(full_messages, e, attempt))
+        return self._read_response(response)
+
+    def _log_success(self, full_messages: list, response: Any, attempt: int) -> None:
+        self.api_logger.log({
+            "type": "api_call",
+            "status": "success",
+            "model": self.model,
+            "input": full_messages,
+            "output_content": response.choices[0].message.content or "",
+            "usage": {"prompt_tokens": getattr(response.usage, "prompt_tokens", 0),
+                      "completion_tokens": getattr(response.usage, "completion_tokens", 0)} if response.usage else {},
+            "attempt": attempt,
+        })
+
+    def _handle_failure(self, full_messages: list, e: Exception, attempt: int) -> float:
+        """Log a failed LiteLLM attempt; return the backoff delay, or raise once retries run out."""
+        wait = backoff_delay(attempt, e)
+        log.warning("[LLM] API call error (attempt %d/%d): %s — retrying in %.1fs", attempt, MAX_RETRIES, e, wait)
+
+        # Log failure
+        self.api_logger.log({
+            "type": "api_call",
+            "status": "error",
+            "model": self.model,
+            "input": full_messages,
+            "error": str(e),
+            "attempt": attempt,
+        })
+
+        if attempt >= MAX_RETRIES:
+            raise RuntimeError(f"API call failed after {MAX_RETRIES} retries: {e}")
+        return wait
+
+    def _read_response(self, response: Any) -> str:
+        """Record usage/reasoning from a LiteLLM response and return its cleaned text."""
         # Store token usage from response
         usage = getattr(response, "usage", None)
         self.last_usage = {
@@ -264,9 +542,6 @@ class LLM:
 
     def _direct_api_call(self, messages: list, call_kwargs: dict) -> str:
         """Direct HTTP call to custom API base, preserving reasoning_content."""
-        import json
-        import urllib.request
-
         # Extract model name (strip openai/ prefix if present)
         model_name = self.model
         if model_name.startswith("openai/"):
@@ -296,23 +571,20 @@ class LLM:
             "Content-Type": "application/json",
         }
         headers.update(self._extra_headers)
-        req = urllib.request.Request(
-            url,
-            data=json.dumps(body).encode(),
-            headers=headers,
-        )
+        data = json.dumps(body).encode()
+        session = self._get_http_session()
 
         attempt = 0
         while attempt < MAX_RETRIES:
             try:
-                req = urllib.request.Request(
-                    url, data=json.dumps(body).encode(), headers=headers,
-                )
-                resp = urllib.request.urlopen(req, timeout=TIMEOUT)
-                result = json.loads(resp.read())
+                if self._rate_limiter is not None:
+                    self._rate_limiter.acquire()
+                resp = session.post(url, data=data, headers=headers, timeout=TIMEOUT)
+                resp.raise_for_status()
+                result = resp.json()
 
                 # Log success
-                api_logger.log({
+                self.api_logger.log({
                     "type": "api_call",
                     "status": "success",
                     "model": model_name,
@@ -325,11 +597,11 @@ class LLM:
                 break
             except Exception as e:
                 attempt += 1
-                wait = min(2 ** attempt, 60)
-                print(f"  [LLM] API call error (attempt {attempt}/{MAX_RETRIES}): {e} — retrying in {wait}s")
+                wait = backoff_delay(attempt, e)
+                log.warning("[LLM] API call error (attempt %d/%d): %s — retrying in %.1fs", attempt, MAX_RETRIES, e, wait)
 
                 # Log failure
-                api_logger.log({
+                self.api_logger.log({
                     "type": "api_call",
                     "status": "error",
                     "model": model_name,
@@ -359,6 +631,14 @@ class LLM:
             content = content.split("</think>")[-1]
         return content.strip()
 
+    async def asimple_call(self, prompt: str, system_message: str | None = None, **kwargs: Any) -> str:
+        """Async variant of simple_call()."""
+        return await self.acall(
+            messages=[{"role": "user", "content": prompt}],
+            system_message=system_message,
+            **kwargs
+        )
+
     def simple_call(self, prompt: str, system_message: str | None = None, **kwargs: Any) -> str:
         """
         Simple call with a single user prompt.
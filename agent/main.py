@@ -3,9 +3,9 @@
 from __future__ import annotations
 
 import argparse
+import importlib
 import sys
 import webbrowser
-import time
 from pathlib import Path
 
 # Add parent directory to path so we can import agent module
@@ -17,7 +17,27 @@ if str(_project_root) not in sys.path:
 
 from agent.agent import Agent
 from agent.config import config
-from agent.reasoning import Reasoning, VanillaReasoning, RLReasoning
+from agent.reasoning import Reasoning
+
+# Reasoning method -> "module:Class", imported only when that method is selected
+REASONING_METHODS = {
+    "vanilla": "agent.reasoning.vanilla_reasoning:VanillaReasoning",
+    "litellm": "agent.reasoning.vanilla_reasoning:VanillaReasoning",  # Backward compatibility
+    "rl": "agent.reasoning.rl_reasoning:RLReasoning",
+}
+
+
+def _load_reasoning_class(method: str) -> type[Reasoning]:
+    """Resolve a REASONING_METHODS entry to its class."""
+    try:
+        target = REASONING_METHODS[method]
+    except KeyError:
+        raise ValueError(
+            f"Unknown reasoning method: {method}. "
+            f"Available methods: vanilla, rl (or litellm for backward compatibility)"
+        ) from None
+    module_name, class_name = target.split(":")
+    return getattr(importlib.import_module(module_name), class_name)
 
 
 def create_reasoning(
@@ -33,6 +53,7 @@ def create_reasoning(
     use_cot: bool = False,
     multimodal: bool = False,
     game_name: str = "tictactoe",
+    rate_limit: float | None = None,
 ) -> Reasoning:
     """
     Factory function to create reasoning engine based on method name.
@@ -45,19 +66,21 @@ def create_reasoning(
         api_base: API base URL (optional)
         temperature: Temperature setting (optional, uses config default if not provided)
         max_tokens: Max tokens setting (optional, uses config default if not provided)
+        rate_limit: Max LLM requests per second (optional, unlimited if not provided)
     
     Returns:
         Reasoning engine instance
     """
     method_lower = method.lower()
+    reasoning_cls = _load_reasoning_class(method_lower)
     
-    # Get defaults from config
-    if model is None:
-        model = config.get_model()
-    if api_key is None:
-        api_key = config.get_api_key(api_provider or config.get_api_provider())
+    # Get defaults from config (provider first: the API key lookup depends on it)
     if api_provider is None:
         api_provider = config.get_api_provider()
+    if api_key is None:
+        api_key = config.get_api_key(api_provider)
+    if model is None:
+        model = config.get_model()
     if api_base is None:
         api_base = config.get_api_base()
     if temperature is None:
@@ -65,29 +88,24 @@ def create_reasoning(
     if max_tokens is None:
         max_tokens = config.get_max_tokens()
     
-    if method_lower == "litellm" or method_lower == "vanilla":
-        return VanillaReasoning(
-            model=model,
-            api_key=api_key,
-            api_provider=api_provider,
-            api_base=api_base,
-            temperature=temperature,
-            max_tokens=max_tokens,
-            no_thinking=no_thinking,
-            extra_headers=extra_headers,
-            use_cot=use_cot,
-            multimodal=multimodal,
-        )
-    elif method_lower == "rl":
-        return RLReasoning(
+    if method_lower == "rl":
+        return reasoning_cls(
             model_path=model,  # Reusing model arg for model_path, if provided
             game_name=game_name,
         )
-    else:
-        raise ValueError(
-            f"Unknown reasoning method: {method}. "
-            f"Available methods: vanilla, rl (or litellm for backward compatibility)"
-        )
+    return reasoning_cls(
+        model=model,
+        api_key=api_key,
+        api_provider=api_provider,
+        api_base=api_base,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        no_thinking=no_thinking,
+        extra_headers=extra_headers,
+        use_cot=use_cot,
+        multimodal=multimodal,
+        rate_limit=rate_limit,
+    )
 
 
 def parse_args() -> argparse.Namespace:
@@ -120,21 +138,22 @@ Examples:
     # Reasoning configuration
     parser.add_argument(
         "--reasoning",
-        type=str,
+        type=str.lower,
+        choices=tuple(REASONING_METHODS),
         default=config.get_reasoning_method(),
-        help=f"Reasoning method to use: vanilla (default: {config.get_reasoning_method()})",
+        help="Reasoning method to use: vanilla (default: %(default)s)",
     )
     parser.add_argument(
         "--model",
         type=str,
         default=config.get_model(),
-        help=f"Model name (default: {config.get_model()})",
+        help="Model name (default: %(default)s)",
     )
     parser.add_argument(
         "--api-provider",
         type=str,
         default=config.get_api_provider(),
-        help=f"API provider: openai, anthropic, gemini, etc. (default: {config.get_api_provider()})",
+        help="API provider: openai, anthropic, gemini, etc. (default: %(default)s)",
     )
     parser.add_argument(
         "--api-key",
@@ -152,13 +171,19 @@ Examples:
         "--temperature",
         type=float,
         default=config.get_temperature(),
-        help=f"Temperature for model (default: {config.get_temperature()})",
+        help="Temperature for model (default: %(default)s)",
     )
     parser.add_argument(
         "--max-tokens",
         type=int,
         default=config.get_max_tokens(),
-        help=f"Maximum tokens in response (default: {config.get_max_tokens()})",
+        help="Maximum tokens in response (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=None,
+        help="Max LLM requests per second, shared by all agents in the process (default: unlimited)",
     )
     
     # Game configuration
@@ -166,19 +191,19 @@ Examples:
         "--game",
         type=str,
         default=config.get_game_name(),
-        help=f"Game name to play (default: {config.get_game_name()})",
+        help="Game name to play (default: %(default)s)",
     )
     parser.add_argument(
         "--backend-url",
         type=str,
         default=config.get_backend_url(),
-        help=f"Backend URL (default: {config.get_backend_url()})",
+        help="Backend URL (default: %(default)s)",
     )
     parser.add_argument(
         "--frontend-url",
         type=str,
         default=config.get_frontend_url(),
-        help=f"Frontend URL (default: {config.get_frontend_url()})",
+        help="Frontend URL (default: %(default)s)",
     )
     parser.add_argument(
         "--session-id",
@@ -198,7 +223,7 @@ Examples:
         "--delay",
         type=float,
         default=config.get_delay(),
-        help=f"Delay between steps in seconds (default: {config.get_delay()})",
+        help="Minimum seconds per step; 0 for headless runs (default: %(default)s)",
     )
     parser.add_argument(
         "--auto-open-browser",
@@ -276,6 +301,7 @@ def main():
             use_cot=args.cot,
             multimodal=args.multimodal,
             game_name=args.game,
+            rate_limit=args.rate_limit,
         )
         print(f"Using reasoning method: {args.reasoning}")
         print(f"Using model: {args.model}")
@@ -302,49 +328,36 @@ def main():
         print("  python main.py --model gpt-4 --game 2048 --reasoning litellm")
         sys.exit(1)
     
-    # Initialize agent
-    agent = Agent(
+    # Initialize agent (the context manager releases its backend connection pool)
+    with Agent(
         reasoning=reasoning,
         backend_url=args.backend_url,
         game_name=args.game,
         session_id=args.session_id,
-    )
-
-    # Always reset to initialize session (and set difficulty if provided)
-    print("\nInitializing session...")
-    import requests as _req
-    reset_params = {}
-    if agent.session_id:
-        reset_params["session_id"] = agent.session_id
-    reset_params["player_name"] = agent.player_name
-    if args.difficulty:
-        reset_params["difficulty"] = args.difficulty
-    reset_url = f"{args.backend_url}/api/game/{args.game}/reset"
-    _reset_res = _req.get(reset_url, params=reset_params)
-    _reset_state = _reset_res.json()
-    if "session_id" in _reset_state:
-        agent.session_id = _reset_state["session_id"]
-    agent.step_count = 0
+    ) as agent:
+        # Always reset to initialize session (and set difficulty if provided)
+        print("\nInitializing session...")
+        agent.reset_game(difficulty=args.difficulty)
 
-    # Print watch URL
-    watch_url = f"{args.frontend_url}?game={args.game}&session_id={agent.session_id}"
-    print(f"\n{'='*60}")
-    print(f"  Game:       {args.game}")
-    print(f"  Model:      {args.model}")
-    print(f"  Difficulty: {args.difficulty or 'default'}")
-    print(f"  Session:    {agent.session_id}")
-    print(f"  Watch URL:  {watch_url}")
-    print(f"{'='*60}\n")
+        # Print watch URL
+        watch_url = f"{args.frontend_url}?game={args.game}&session_id={agent.session_id}"
+        print(f"\n{'='*60}")
+        print(f"  Game:       {args.game}")
+        print(f"  Model:      {args.model}")
+        print(f"  Difficulty: {args.difficulty or 'default'}")
+        print(f"  Session:    {agent.session_id}")
+        print(f"  Watch URL:  {watch_url}")
+        print(f"{'='*60}\n")
 
-    if args.auto_open_browser:
-        try:
-            time.sleep(0.5)
-            webbrowser.open(watch_url)
-        except Exception as e:
-            print(f"Warning: Failed to open browser: {e}")
+        if args.auto_open_browser:
+            # No readiness wait needed: the /reset above already got a response
+            try:
+                webbrowser.open(watch_url)
+            except Exception as e:
+                print(f"Warning: Failed to open browser: {e}")
     
-    # Run the agent loop
-    agent.run_loop(max_steps=max_steps, delay=args.delay, continue_to_level=args.continue_to_level)
+        # Run the agent loop
+        agent.run_loop(max_steps=max_steps, delay=args.delay, continue_to_level=args.continue_to_level)
 
 
 if __name__ == "__main__":
@@ -2,9 +2,13 @@
 
 from __future__ import annotations
 
+from typing import TYPE_CHECKING
+
 from .base import Reasoning
 from .vanilla_reasoning import VanillaReasoning
-from .rl_reasoning import RLReasoning
+
+if TYPE_CHECKING:
+    from .rl_reasoning import RLReasoning
 
 # Backward compatibility aliases
 LiteLLMReasoning = VanillaReasoning
@@ -17,3 +21,11 @@ __all__ = [
     "LiteLLMReasoning",  # Backward compatibility
     "GPTReasoning",  # Backward compatibility
 ]
+
+
+def __getattr__(name: str):
+    # RLReasoning pulls in numpy (and sb3 at construction); import it only when asked for
+    if name == "RLReasoning":
+        from .rl_reasoning import RLReasoning
+        return RLReasoning
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,3 +1,4 @@
+import logging
 import os
 import sys
 import numpy as np
@@ -8,6 +9,8 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.
 
 from .base import Reasoning
 
+log = logging.getLogger(__name__)
+
 class RLReasoning(Reasoning):
     """
     RL Baseline reasoning engine.
@@ -84,7 +87,7 @@ class RLReasoning(Reasoning):
         # Safety fallback (just in case the mask fails to prevent an invalid move)
         if action_str not in valid_actions and valid_actions:
             import random
-            print(f"[RLReasoning Warning] Model predicted invalid action {action_str}, falling back to random.")
+            log.warning("Model predicted invalid action %s, falling back to random.", action_str)
             return random.choice(valid_actions)
             
         return action_str
@@ -115,7 +118,7 @@ class RLReasoning(Reasoning):
         # Safety fallback
         if action_str not in valid_actions and valid_actions:
             import random
-            print(f"[RLReasoning Warning] Model predicted invalid action {action_str}, falling back to random.")
+            log.warning("Model predicted invalid action %s, falling back to random.", action_str)
             return random.choice(valid_actions)
             
         return action_str
@@ -163,7 +166,7 @@ class RLReasoning(Reasoning):
         
         if action_str not in valid_actions and valid_actions:
             import random
-            print(f"[RLReasoning Warning] Model predicted invalid action {action_str}, falling back to random.")
+            log.warning("Model predicted invalid action %s, falling back to random.", action_str)
             return random.choice(valid_actions)
             
         return action_str
@@ -211,7 +214,7 @@ class RLReasoning(Reasoning):
         # Safety fallback
         if action_str not in valid_actions and valid_actions:
             import random
-            print(f"[RLReasoning Warning] Model predicted invalid action {action_str}, falling back to random.")
+            log.warning("Model predicted invalid action %s, falling back to random.", action_str)
             return random.choice(valid_actions)
             
         return action_str
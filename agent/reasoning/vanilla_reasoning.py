@@ -11,12 +11,74 @@ No complex agent structures, just simple prompt → LLM → action.
 
 from __future__ import annotations
 
+import asyncio
+import functools
 import json
+import logging
 from typing import Any
 
-from agent.llm import LLM
+from agent.llm import LLM, CompletionCache, detect_provider
 from .base import Reasoning
 
+# orjson renders the same indent=2 layout in C (json's indent path is pure Python)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+MAX_INVALID_RETRIES = 20  # LLM re-asks when the reply is not a valid action
+ACTION_CACHE_SIZE = 4096  # validated actions remembered across engines (LRU)
+
+log = logging.getLogger(__name__)
+
+MULTIMODAL_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": "You are a good game player. First give your analysis, then output your answer in the required format.",
+}
+
+# prompt key -> (action, raw_response); only validated (non-fallback) answers.
+# Shared so parallel agents on the same model reuse each other's decisions.
+action_cache = CompletionCache(ACTION_CACHE_SIZE)
+
+
+@functools.lru_cache(maxsize=256)
+def _join_actions(actions: tuple[str, ...]) -> str:
+    """Render the valid-action list (the same few lists recur every step)."""
+    return ", ".join(actions)
+
+
+def _has_float(obj: Any) -> bool:
+    """Whether a JSON-like value contains a float anywhere."""
+    if isinstance(obj, float):
+        return True
+    if isinstance(obj, dict):
+        return any(_has_float(v) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return any(_has_float(v) for v in obj)
+    return False
+
+
+def _dump_state(game_state: dict[str, Any]) -> str:
+    """
+    Pretty-print the state exactly as json.dumps(..., ensure_ascii=False, indent=2) would.
+
+    orjson is used only for float-free states: it formats floats differently
+    (1e16 vs 1e+16) and writes NaN/Infinity as null, which would change the
+    prompt text and with it the completion-cache keys.
+    """
+    if orjson is not None and not _has_float(game_state):
+        try:
+            return orjson.dumps(game_state, option=orjson.OPT_INDENT_2).decode()
+        except TypeError:  # e.g. non-str keys or ints beyond 64 bits
+            pass
+    return json.dumps(game_state, ensure_ascii=False, indent=2)
+
+
+@functools.lru_cache(maxsize=256)
+def _format_grid(rows: tuple[tuple[Any, ...], ...]) -> str:
+    """Render a 2D board; keyed by its tuple fingerprint so repeated boards are free."""
+    return "\n".join(" ".join(map(str, row)) for row in rows)
+
 
 class VanillaReasoning(Reasoning):
     """
@@ -42,6 +104,8 @@ class VanillaReasoning(Reasoning):
         extra_headers: dict | None = None,
         use_cot: bool = False,
         multimodal: bool = False,
+        cache_enabled: bool | None = None,
+        rate_limit: float | None = None,
     ):
         """
         Initialize vanilla reasoning.
@@ -53,9 +117,21 @@ class VanillaReasoning(Reasoning):
             api_base: API base URL (for local models like Ollama)
             temperature: Sampling temperature (0.0-2.0)
             max_tokens: Max tokens in response
+            cache_enabled: Reuse the action chosen for an identical prompt
+                           (default: only when temperature is 0)
+            rate_limit: Max LLM requests per second for this model, shared
+                        across engines (None = unlimited)
         """
         self.use_cot = use_cot
         self.multimodal = multimodal
+        self.cache_enabled = temperature == 0 if cache_enabled is None else cache_enabled
+        # Anthropic: send the (session-constant) rules as a cached system block
+        # so the provider reuses the prefix instead of re-reading it every step
+        self.prompt_caching = (api_provider or detect_provider(model)) == "anthropic"
+        # Rendered rules for the last rules text (constant for a session)
+        self._rules_text: str | None = None
+        self._rules_section = ""
+        self._rules_message: dict[str, Any] | None = None
         # Initialize unified LLM interface
         self.llm = LLM(
             model=model,
@@ -66,6 +142,7 @@ class VanillaReasoning(Reasoning):
             max_tokens=max_tokens,
             no_thinking=no_thinking,
             extra_headers=extra_headers,
+            rate_limit=rate_limit,
         )
     
     def reason(self, game_state: dict[str, Any], valid_actions: list[str], rules: str = "") -> str:
@@ -80,20 +157,135 @@ class VanillaReasoning(Reasoning):
         Returns:
             Action string (one of valid_actions)
         """
-        # Build prompt
+        game_name = game_state.get("game", "unknown")
+        prompt = self._build_prompt(game_state, valid_actions, rules)
+        cache_key = self._action_cache_key(prompt)
+        if cache_key is not None and self._use_cached_action(cache_key, valid_actions):
+            return self.last_action
+
+        valid_set = frozenset(valid_actions)
+        try:
+            # Build the messages once; invalid-action retries resend the same list
+            messages = None
+            if self.multimodal and hasattr(game_state, '__getitem__'):
+                # Multimodal: render board as image and build visual prompt
+                image_path = self._render_board(game_name, game_state)
+                if image_path:
+                    mm_prompt = self._build_multimodal_prompt(game_name, game_state, valid_actions, rules)
+                    messages = self._multimodal_messages(mm_prompt, image_path)
+            if messages is None:
+                messages = self._text_messages(prompt)
+
+            # Retry the LLM call if output is not a valid action
+            attempt = 0
+            raw_response = ""
+            action = ""
+            last_usage = {"input_tokens": 0, "output_tokens": 0}
+
+            while attempt < MAX_INVALID_RETRIES:
+                # Retries must reach the model: a cached reply would repeat the same mistake
+                response = self.llm.call(messages, use_cache=attempt == 0)
+                raw_response, action = self._parse_response(response)
+                last_usage = self._add_usage(last_usage)
+
+                # Validate that the action is in valid_actions
+                if action in valid_set:
+                    break  # Success
+
+                if attempt == 0:
+                    self.llm.discard_cached(messages)
+                attempt += 1
+                log.warning("Model returned invalid action %r (attempt %d/%d)", action, attempt, MAX_INVALID_RETRIES)
+
+            return self._finish_reason(cache_key, action, raw_response, valid_actions, valid_set, last_usage)
+
+        except Exception as e:
+            self._record_error(e)
+            raise RuntimeError(f"LLM call failed: {e}") from e
+
+    async def areason(self, game_state: dict[str, Any], valid_actions: list[str], rules: str = "") -> str:
+        """
+        Async variant of reason() that awaits the LLM (litellm.acompletion).
+
+        Many agents can then wait on their LLM calls on one event loop without
+        each holding a worker thread. Same prompt, validation retries, caching
+        and logging attributes as reason().
+        """
+        if self.multimodal:
+            # Board rendering and the image call are synchronous; run the sync path off-loop
+            return await asyncio.to_thread(self.reason, game_state, valid_actions, rules)
+
+        prompt = self._build_prompt(game_state, valid_actions, rules)
+        cache_key = self._action_cache_key(prompt)
+        if cache_key is not None and self._use_cached_action(cache_key, valid_actions):
+            return self.last_action
+
+        # Capture before the first await: a concurrent call may switch the rules block
+        messages = self._text_messages(prompt)
+        valid_set = frozenset(valid_actions)
+        try:
+            attempt = 0
+            raw_response = ""
+            action = ""
+            last_usage = {"input_tokens": 0, "output_tokens": 0}
+
+            while attempt < MAX_INVALID_RETRIES:
+                raw_response, action = self._parse_response(await self.llm.acall(messages, use_cache=attempt == 0))
+                last_usage = self._add_usage(last_usage)
+                if action in valid_set:
+                    break
+
+                if attempt == 0:
+                    self.llm.discard_cached(messages)
+                attempt += 1
+                log.warning("Model returned invalid action %r (attempt %d/%d)", action, attempt, MAX_INVALID_RETRIES)
+
+            return self._finish_reason(cache_key, action, raw_response, valid_actions, valid_set, last_usage)
+
+        except Exception as e:
+            self._record_error(e)
+            raise RuntimeError(f"LLM call failed: {e}") from e
+
+    async def reason_batch(
+        self,
+        items: list[tuple[dict[str, Any], list[str], str]],
+        max_concurrency: int | None = None,
+    ) -> list[str]:
+        """
+        Decide actions for several independent (game_state, valid_actions, rules)
+        items at once, e.g. parallel sessions or lookahead candidates. The LLM
+        calls overlap via asyncio.gather; results keep the input order.
+
+        max_concurrency caps the number of requests in flight (None = all at
+        once), which keeps large batches under provider rate limits.
+        The last_* logging attributes describe whichever item finished last.
+        """
+        if max_concurrency is None:
+            return list(await asyncio.gather(*(self.areason(*item) for item in items)))
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run(item: tuple[dict[str, Any], list[str], str]) -> str:
+            async with semaphore:
+                return await self.areason(*item)
+
+        return list(await asyncio.gather(*(run(item) for item in items)))
+
+    def _build_prompt(self, game_state: dict[str, Any], valid_actions: list[str], rules: str) -> str:
+        """Render the text prompt for one decision."""
         game_name = game_state.get("game", "unknown")
         board = game_state.get("board", [])
         score = game_state.get("score", 0)
         
-        # Include rules in prompt if provided
-        rules_section = ""
-        if rules:
-            rules_section = f"\n\nGAME RULES:\n{rules}\n"
-        
+        # Include rules in prompt if provided (rendered once per rules text)
+        if rules != self._rules_text:
+            self._set_rules(rules)
+        rules_section = self._rules_section
+
         # Build game-specific extra context and board formatting
         extra_context = ""
         board_str = self._format_board(board)
-        state_json = json.dumps(game_state, ensure_ascii=False, indent=2)
+        state_json = _dump_state(game_state)
 
         if game_name == "mergefall":
             next_tile = game_state.get("next_tile", "?")
@@ -120,14 +312,14 @@ class VanillaReasoning(Reasoning):
                 f"last_mismatch: {game_state.get('last_mismatch')}\n"
             )
 
-        actions_str = ', '.join(valid_actions)
+        actions_str = _join_actions(tuple(valid_actions))
 
         if game_name == "fourinarow":
             board_label = "Current board (X=you, O=opponent, .=empty):"
         else:
             board_label = "Current board:"
 
-        prompt = f"""You are playing the game "{game_name}".{rules_section}
+        return f"""You are playing the game "{game_name}".{rules_section}
 
 {board_label}
 {board_str}
@@ -141,81 +333,112 @@ IMPORTANT: You MUST choose exactly one action from this list (copy it exactly):
 
 Pick the best action. Respond with ONLY the action string, nothing else."""
 
-        try:
-            # Retry the LLM call up to 20 times if output is not a valid action
-            MAX_INVALID_RETRIES = 20
-            attempt = 0
-            raw_response = ""
-            action = ""
-            fallback = False
-            last_usage = {"input_tokens": 0, "output_tokens": 0}
-
-            while attempt < MAX_INVALID_RETRIES:
-                # Multimodal: render board as image and build visual prompt
-                if self.multimodal and hasattr(game_state, '__getitem__'):
-                    image_path = self._render_board(game_name, game_state)
-                    if image_path:
-                        mm_prompt = self._build_multimodal_prompt(game_name, game_state, valid_actions, rules)
-                        mm_system = "You are a good game player. First give your analysis, then output your answer in the required format."
-                        response = self._multimodal_call(mm_prompt, image_path, mm_system)
-                    else:
-                        response = self.llm.simple_call(prompt, system_message=system_message)
-                else:
-                    response = self.llm.simple_call(prompt, system_message=system_message)
-
-                raw_response = response.strip()
-
-                # Parse "Answer: xxx" format if CoT
-                action = raw_response
-                if "Answer:" in raw_response:
-                    action = raw_response.split("Answer:")[-1].strip()
-                elif "answer:" in raw_response:
-                    action = raw_response.split("answer:")[-1].strip()
-
-                # Accumulate usage
-                call_usage = getattr(self.llm, "last_usage", {"input_tokens": 0, "output_tokens": 0})
-                last_usage = {
-                    "input_tokens": last_usage["input_tokens"] + call_usage.get("input_tokens", 0),
-                    "output_tokens": last_usage["output_tokens"] + call_usage.get("output_tokens", 0),
-                }
-
-                # Validate that the action is in valid_actions
-                if action in valid_actions:
-                    break  # Success
-
-                attempt += 1
-                print(f"Warning: Model returned invalid action '{action}' (attempt {attempt}/{MAX_INVALID_RETRIES})")
-
-            # If still invalid after all retries, fallback to first valid action
-            if action not in valid_actions:
-                print(f"Exhausted {MAX_INVALID_RETRIES} retries, falling back to first valid action")
-                action = valid_actions[0] if valid_actions else ""
-                fallback = True
-
-            # Store last response details for logging
-            self.last_raw_response = raw_response
-            self.last_action = action
-            self.last_fallback = fallback
-            self.last_usage = last_usage
-
-            return action
-
-        except Exception as e:
-            print(f"Error calling model ({self.llm.model}): {e}")
-            self.last_raw_response = f"ERROR: {e}"
-            self.last_action = ""
-            self.last_fallback = True
-            raise RuntimeError(f"LLM call failed: {e}") from e
+    def _set_rules(self, rules: str) -> None:
+        """Render the rules either inline in the prompt or as a cacheable system block."""
+        self._rules_text = rules
+        self._rules_section = ""
+        self._rules_message = None
+        if not rules:
+            return
+        if self.prompt_caching:
+            self._rules_message = {
+                "role": "system",
+                "content": [{
+                    "type": "text",
+                    "text": f"GAME RULES:\n{rules}",
+                    "cache_control": {"type": "ephemeral"},
+                }],
+            }
+        else:
+            self._rules_section = f"\n\nGAME RULES:\n{rules}\n"
+
+    def _text_messages(self, prompt: str) -> list[dict[str, Any]]:
+        """Chat messages for a text prompt, led by the cached rules block when enabled."""
+        user = {"role": "user", "content": prompt}
+        return [self._rules_message, user] if self._rules_message else [user]
+
+    def _action_cache_key(self, prompt: str) -> str | None:
+        if not self.cache_enabled:
+            return None
+        # Rules are keyed separately: with prompt caching they are not part of the prompt
+        mode = {"multimodal": self.multimodal, "use_cot": self.use_cot, "rules": self._rules_text}
+        return action_cache.make_key(self.llm.model, self.llm._api_base, [mode, prompt], self.llm._base_kwargs)
+
+    def _use_cached_action(self, cache_key: str, valid_actions: list[str]) -> bool:
+        """Repeated state (e.g. after a no-op move): reuse the action without an LLM call."""
+        hit = action_cache.get(cache_key)
+        if hit is None or hit[0] not in valid_actions:
+            return False
+        self.last_action, self.last_raw_response = hit
+        self.last_fallback = False
+        self.last_usage = {"input_tokens": 0, "output_tokens": 0}
+        return True
+
+    @staticmethod
+    def _parse_response(response: str) -> tuple[str, str]:
+        """Return (raw_response, action), taking the text after "Answer:" for CoT replies."""
+        raw_response = response.strip()
+        action = raw_response
+        if "Answer:" in raw_response:
+            action = raw_response.split("Answer:")[-1].strip()
+        elif "answer:" in raw_response:
+            action = raw_response.split("answer:")[-1].strip()
+        return raw_response, action
+
+    def _add_usage(self, usage: dict[str, int]) -> dict[str, int]:
+        """Accumulate the last LLM call's token usage onto `usage`."""
+        call_usage = getattr(self.llm, "last_usage", {"input_tokens": 0, "output_tokens": 0})
+        return {
+            "input_tokens": usage["input_tokens"] + call_usage.get("input_tokens", 0),
+            "output_tokens": usage["output_tokens"] + call_usage.get("output_tokens", 0),
+        }
+
+    def _finish_reason(
+        self,
+        cache_key: str | None,
+        action: str,
+        raw_response: str,
+        valid_actions: list[str],
+        valid_set: frozenset[str],
+        usage: dict[str, int],
+    ) -> str:
+        """Apply the fallback, store logging details and cache a validated action."""
+        fallback = False
+        # If still invalid after all retries, fallback to first valid action
+        if action not in valid_set:
+            log.warning("Exhausted %d retries, falling back to first valid action", MAX_INVALID_RETRIES)
+            action = next(iter(valid_actions), "")
+            fallback = True
+
+        # Store last response details for logging
+        self.last_raw_response = raw_response
+        self.last_action = action
+        self.last_fallback = fallback
+        self.last_usage = usage
+
+        if cache_key is not None and not fallback:
+            action_cache.put(cache_key, action, raw_response)
+
+        return action
+
+    def _record_error(self, e: Exception) -> None:
+        log.error("Error calling model (%s): %s", self.llm.model, e)
+        self.last_raw_response = f"ERROR: {e}"
+        self.last_action = ""
+        self.last_fallback = True
     
     def _format_board(self, board: Any) -> str:
         """Format board for display in prompt."""
         if isinstance(board, list):
             if len(board) > 0 and isinstance(board[0], list):
                 # 2D board
-                return "\n".join(" ".join(str(cell) for cell in row) for row in board)
+                try:
+                    return _format_grid(tuple(map(tuple, board)))
+                except TypeError:  # unhashable cells (e.g. dicts): format directly
+                    return "\n".join(" ".join(map(str, row)) for row in board)
             else:
                 # 1D board
-                return " ".join(str(cell) for cell in board)
+                return " ".join(map(str, board))
         return str(board)
 
     def _format_fourinarow(self, board: list) -> str:
@@ -310,25 +533,24 @@ Pick the best action. Respond with ONLY the action string, nothing else."""
                 temp.size = 6
                 return temp.render()
         except Exception as e:
-            print(f"  [Multimodal] Failed to render: {e}")
+            log.warning("[Multimodal] Failed to render: %s", e)
         return None
 
-    def _multimodal_call(self, prompt: str, image_path: str, system_message: str) -> str:
-        """Call LLM with text prompt + image."""
+    @staticmethod
+    def _multimodal_messages(prompt: str, image_path: str) -> list[dict[str, Any]]:
+        """Chat messages for a text prompt + board image."""
         import base64
 
         with open(image_path, "rb") as f:
             b64 = base64.b64encode(f.read()).decode("utf-8")
 
-        messages = []
-        if system_message:
-            messages.append({"role": "system", "content": system_message})
-        messages.append({
-            "role": "user",
-            "content": [
-                {"type": "text", "text": prompt},
-                {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{b64}"}},
-            ],
-        })
-
-        return self.llm.call(messages)
+        return [
+            MULTIMODAL_SYSTEM_MESSAGE,
+            {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": prompt},
+                    {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{b64}"}},
+                ],
+            },
+        ]
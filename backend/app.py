@@ -2,15 +2,26 @@
 
 from __future__ import annotations
 
+import atexit
 import logging
 import json
+import threading
+import time
 import uuid
+from collections import OrderedDict
 from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
 
 from flask import Flask, jsonify, request
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 
+try:
+    import orjson  # optional: faster response serialization
+except ImportError:
+    orjson = None
+
 # ── Player registry ──────────────────────────────────────────────────
 
 PLAYERS_FILE = Path(__file__).resolve().parent / "players.json"
@@ -29,6 +40,7 @@ def _save_players(players: dict) -> None:
     with open(PLAYERS_FILE, "w", encoding="utf-8") as f:
         json.dump(players, f, ensure_ascii=False, indent=2)
 
+from games.base import dump_board
 from games.game_2048 import Game2048
 from games.game_mergefall import MergeFall
 from games.game_nuts_bolts import NutsBolts
@@ -62,6 +74,23 @@ else:
     app = Flask(__name__)
 CORS(app)
 
+
+class ORJSONProvider(DefaultJSONProvider):
+    """jsonify() via orjson; falls back to the stdlib encoder for anything orjson rejects."""
+
+    def dumps(self, obj, **kwargs) -> str:
+        try:
+            return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode()
+        except TypeError:  # orjson.JSONEncodeError, e.g. integers wider than 64 bits
+            return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+if orjson is not None:
+    app.json = ORJSONProvider(app)
+
 # Registry: add more games here.
 GAMES: dict[str, type] = {
     "2048": Game2048,
@@ -77,9 +106,113 @@ GAMES: dict[str, type] = {
     "sudoku": Sudoku,
 }
 
-# Active game sessions keyed by (game_name, session_id) tuple.
-# Each frontend gets its own independent game instance.
-sessions: dict[tuple[str, str], object] = {}
+# Sessions idle longer than this are dropped (an unfinished game can still be resumed from its save)
+SESSION_TTL = 3600
+MAX_SESSIONS = 10_000
+
+
+class SessionStore:
+    """
+    Thread-safe registry of game instances keyed by (game_name, session_id).
+
+    Flask serves requests on several threads, so lookups and registration
+    happen under a lock (one instance per key, never two); the factory itself
+    runs outside it. Sessions idle for longer than *ttl* seconds, or the least
+    recently used ones beyond *maxsize*, are evicted: unfinished games are
+    saved for /resume and their log files closed. Evicted keys are remembered
+    (up to *maxsize* of them) so callers can tell "expired" from "never existed".
+    """
+
+    def __init__(self, maxsize: int = MAX_SESSIONS, ttl: float = SESSION_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # key -> (last_access, game); oldest access first
+        self._items: OrderedDict[tuple[str, str], tuple[float, object]] = OrderedDict()
+        # Recently evicted keys, oldest first
+        self._evicted: OrderedDict[tuple[str, str], None] = OrderedDict()
+
+    def __contains__(self, key: tuple[str, str]) -> bool:
+        with self._lock:
+            return key in self._items
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+    def was_evicted(self, key: tuple[str, str]) -> bool:
+        """True if *key* was registered once but has since been evicted."""
+        with self._lock:
+            return key in self._evicted
+
+    def get(self, key: tuple[str, str]):
+        """Return the game registered for *key* (refreshing its access time), or None."""
+        now = time.monotonic()
+        with self._lock:
+            item = self._items.pop(key, None)
+            evicted = self._evict(now)
+            if item is not None:
+                self._items[key] = (now, item[1])
+        self._retire(evicted)
+        return None if item is None else item[1]
+
+    def get_or_create(self, key: tuple[str, str], factory) -> tuple[object, bool]:
+        """Return (game, created) for *key*, calling *factory()* only if it is not registered."""
+        game = self.get(key)
+        if game is not None:
+            return game, False
+        # Build outside the lock; if another thread registered the key meanwhile, keep its game
+        new_game = factory()
+        with self._lock:
+            item = self._items.pop(key, None)
+            created = item is None
+            game = new_game if created else item[1]
+            self._items[key] = (time.monotonic(), game)
+            self._evicted.pop(key, None)
+        return game, created
+
+    def close_all(self) -> None:
+        """Close every session's log file, flushing rows still buffered (registered with atexit)."""
+        with self._lock:
+            games = [game for _, game in self._items.values()]
+        for game in games:
+            game.close_log()
+
+    def _evict(self, now: float) -> list[tuple[tuple[str, str], object]]:
+        """
+        Drop expired sessions, and the oldest ones until there is room for one more.
+
+        Called with the lock held; returns the dropped (key, game) pairs for _retire().
+        """
+        items = self._items
+        evicted = []
+        while items:
+            key, (last_access, game) = next(iter(items.items()))
+            if len(items) < self.maxsize and now - last_access < self.ttl:
+                break
+            del items[key]
+            evicted.append((key, game))
+            self._evicted[key] = None
+        while len(self._evicted) > self.maxsize:
+            self._evicted.popitem(last=False)
+        return evicted
+
+    def _retire(self, evicted: list[tuple[tuple[str, str], object]]) -> None:
+        """Save unfinished evicted games (for /resume) and close their logs, outside the lock."""
+        for key, game in evicted:
+            # Games without a move yet are skipped so they never overwrite a real save
+            if getattr(game, "_steps", 0) and not getattr(game, "game_over", False):
+                try:
+                    game.save()
+                except OSError:
+                    log.exception("Could not save evicted session for game '%s' session='%s'", key[0], key[1])
+            game.close_log()
+            log.info("Evicted session for game '%s' session='%s'", key[0], key[1])
+
+
+# Active game sessions. Each frontend gets its own independent game instance.
+sessions = SessionStore()
+atexit.register(sessions.close_all)
 
 
 def _get_session_id(required: bool = False) -> str | None:
@@ -97,7 +230,7 @@ def _get_session_id(required: bool = False) -> str | None:
     return session_id
 
 
-def _get_game(name: str, session_id: str | None = None, require_session: bool = False):
+def _get_game(name: str, session_id: str | None = None, require_session: bool = False, create: bool = True):
     """
     Return the game instance for *name* and *session_id*.
     
@@ -105,6 +238,7 @@ def _get_game(name: str, session_id: str | None = None, require_session: bool =
         name: Game name
         session_id: Optional session ID. If None, gets from request.
         require_session: If True, session_id must be provided or returns error.
+        create: If False, an unregistered session is not created (game is None).
     
     Returns:
         (game_instance, session_id) or (None, None) if error
@@ -114,36 +248,60 @@ def _get_game(name: str, session_id: str | None = None, require_session: bool =
         if require_session and session_id is None:
             return None, None
     
-    key = (name, session_id)
-    
-    if key not in sessions:
-        if name not in GAMES:
-            return None, None
+    if name not in GAMES:
+        return None, None
+
+    def factory():
         game_instance = GAMES[name]()
         # Set session_id for logging
         game_instance.set_session_id(session_id)
-        sessions[key] = game_instance
+        return game_instance
+
+    if create:
+        game, created = sessions.get_or_create((name, session_id), factory)
+    else:
+        game, created = sessions.get((name, session_id)), False
+        if game is None:
+            return None, session_id
+    if created:
         log.info("Created new session for game '%s' session='%s'", name, session_id)
 
     # Always update player_name if provided (covers both new and existing sessions)
     player_name = request.args.get("player_name")
-    if player_name and hasattr(sessions[key], "set_player_name"):
-        sessions[key].set_player_name(player_name)
+    if player_name and hasattr(game, "set_player_name"):
+        game.set_player_name(player_name)
 
-    return sessions[key], session_id
+    return game, session_id
 
 
 def _log_action(game_name: str, action: str | None, state: dict) -> None:
+    # Skip serializing the board when INFO is filtered out
+    if not log.isEnabledFor(logging.INFO):
+        return
     log.info(
         "game=%s | action=%s | score=%s | game_over=%s | board=%s",
         game_name,
         action,
         state.get("score"),
         state.get("game_over"),
-        json.dumps(state.get("board")),
+        dump_board(state.get("board")),
     )
 
 
+def _session_gone(name: str):
+    """410 for a session that existed but was evicted."""
+    return jsonify({"error": f"Session for game '{name}' has expired; resume or reset the game."}), 410
+
+
+def _unknown_session(name: str, session_id: str):
+    """404 for a game name we don't know, 410 for an expired session, 404 for one never created."""
+    if name not in GAMES:
+        return jsonify({"error": f"Unknown game: {name}"}), 404
+    if sessions.was_evicted((name, session_id)):
+        return _session_gone(name)
+    return jsonify({"error": f"Unknown session: {session_id}"}), 404
+
+
 # ── Routes ──────────────────────────────────────────────────────────
 
 
@@ -155,7 +313,14 @@ def list_games():
 
 @app.get("/api/game/<name>/state")
 def game_state(name: str):
-    """Return current state without modifying it. Requires session_id parameter."""
+    """
+    Return current state without modifying it. Requires session_id parameter.
+
+    A new session_id starts a new game (the frontend mints its ids client-side);
+    one whose session has expired gets 410 instead of a silently fresh board.
+    """
+    if name in GAMES and sessions.was_evicted((name, request.args.get("session_id"))):
+        return _session_gone(name)
     game, session_id = _get_game(name, require_session=True)
     if session_id is None:
         return jsonify({"error": "Missing required 'session_id' query parameter."}), 400
@@ -220,8 +385,7 @@ def game_resume(name: str):
 
     # Restore game instance into sessions
     session_id = save_data.get("session_id") or str(uuid.uuid4())
-    key = (name, session_id)
-    if key not in sessions:
+    def create():
         game_instance = GAMES[name]()
         game_instance.set_session_id(session_id)
         game_instance.set_player_name(player_name)
@@ -229,9 +393,16 @@ def game_resume(name: str):
         saved_state = save_data.get("state", {})
         if hasattr(game_instance, "restore_state"):
             game_instance.restore_state(saved_state)
-        sessions[key] = game_instance
-
-    state = sessions[key].get_state()
+        return game_instance
+
+    try:
+        game, _ = sessions.get_or_create((name, session_id), create)
+    except ValueError as e:
+        # A save this build cannot represent (e.g. a 2048 tile above game_2048.MAX_TILE)
+        log.warning("Discarding unusable save for game=%s player=%s: %s", name, player_name, e)
+        BaseGame.delete_save(player_name, name)
+        return jsonify({"has_save": False})
+    state = game.get_state()
     state["session_id"] = session_id
     state["resumed"] = True
     return jsonify({"has_save": True, **state})
@@ -260,11 +431,11 @@ def game_reset(name: str):
 @app.get("/api/game/<name>/bot_move")
 def game_bot_move(name: str):
     """Trigger the bot's move (used for two-phase turn rendering)."""
-    game, session_id = _get_game(name, require_session=True)
+    game, session_id = _get_game(name, require_session=True, create=False)
     if session_id is None:
         return jsonify({"error": "Missing required 'session_id' query parameter."}), 400
     if game is None:
-        return jsonify({"error": f"Unknown game: {name}"}), 404
+        return _unknown_session(name, session_id)
     if not hasattr(game, "apply_bot_move"):
         return jsonify({"error": f"Game '{name}' does not support separate bot moves."}), 400
     state = game.apply_bot_move()
@@ -281,23 +452,27 @@ def game_bot_move(name: str):
 @app.get("/api/game/<name>/valid_actions")
 def game_valid_actions(name: str):
     """Return currently valid actions. Requires session_id parameter."""
-    game, session_id = _get_game(name, require_session=True)
+    game, session_id = _get_game(name, require_session=True, create=False)
     if session_id is None:
         return jsonify({"error": "Missing required 'session_id' query parameter."}), 400
     if game is None:
-        return jsonify({"error": f"Unknown game: {name}"}), 404
+        return _unknown_session(name, session_id)
     return jsonify({"valid_actions": game.valid_actions(), "session_id": session_id})
 
 
 @app.get("/api/game/<name>/log")
 def game_log(name: str):
-    """Return the operation log for the current session. Requires session_id parameter."""
-    game, session_id = _get_game(name, require_session=True)
+    """
+    Return the operation log for the current session. Requires session_id parameter.
+
+    Optional ?tail=N returns only the last N entries (steps still counts all of them).
+    """
+    game, session_id = _get_game(name, require_session=True, create=False)
     if session_id is None:
         return jsonify({"error": "Missing required 'session_id' query parameter."}), 400
     if game is None:
-        return jsonify({"error": f"Unknown game: {name}"}), 404
-    log_info = game.get_log_info()
+        return _unknown_session(name, session_id)
+    log_info = game.get_log_info(tail=request.args.get("tail", type=int))
     log_info["session_id"] = session_id
     return jsonify(log_info)
 
@@ -317,16 +492,20 @@ def game_agent_error(name: str):
     return jsonify({"ok": True})
 
 
+@lru_cache(maxsize=None)
+def _rules_body(name: str) -> str:
+    """Serialized /rules response for *name* (rules are static, so each game is built once)."""
+    # Create a temporary game instance to get rules (rules don't depend on session state)
+    game_instance = GAMES[name]()
+    return app.json.dumps({"game": name, "rules": game_instance.get_rules()})
+
+
 @app.get("/api/game/<name>/rules")
 def game_rules(name: str):
     """Return the game rules description. Does not require session_id."""
     if name not in GAMES:
         return jsonify({"error": f"Unknown game: {name}"}), 404
-    
-    # Create a temporary game instance to get rules (rules don't depend on session state)
-    game_instance = GAMES[name]()
-    rules = game_instance.get_rules()
-    return jsonify({"game": name, "rules": rules})
+    return app.response_class(_rules_body(name), mimetype="application/json")
 
 
 # ── Player routes ──────────────────────────────────────────────────
@@ -395,4 +574,5 @@ def serve_frontend(path):
 
 if __name__ == "__main__":
     debug = os.environ.get("FLASK_DEBUG", "1") == "1"
-    app.run(host="0.0.0.0", port=5001, debug=debug)
+    # Development server; see asgi.py for serving under uvicorn
+    app.run(host="0.0.0.0", port=5001, debug=debug, threaded=True)
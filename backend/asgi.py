@@ -0,0 +1,25 @@
+"""EvoPlay – ASGI entry point for serving the backend with an ASGI server.
+
+    cd backend
+    pip install asgiref uvicorn
+    uvicorn asgi:app --host 0.0.0.0 --port 5001
+
+Requests are dispatched to the Flask app on a thread pool, so many agents can
+be served concurrently. Game sessions live in process memory: run a single
+worker process (no --workers), otherwise a session's requests would be split
+across independent registries.
+"""
+
+from __future__ import annotations
+
+try:
+    from asgiref.wsgi import WsgiToAsgi
+except ImportError as e:
+    raise ImportError(
+        f"Failed to import asgiref: {e}\n"
+        "Please install it with: pip install asgiref uvicorn"
+    ) from e
+
+from app import app as flask_app
+
+app = WsgiToAsgi(flask_app)
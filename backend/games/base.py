@@ -3,18 +3,64 @@
 from __future__ import annotations
 
 import csv
+import itertools
 import json
 import os
 import time
 from abc import ABC, abstractmethod
+from collections import deque
 from datetime import datetime
 from pathlib import Path
 from typing import Any
 
+try:
+    import orjson  # optional: faster board encoding for logs
+except ImportError:
+    orjson = None
+
 # All log files go here (relative to backend/)
 LOG_DIR = Path(__file__).resolve().parent.parent / "logs"
 # Save files for resuming unfinished games
 SAVE_DIR = Path(__file__).resolve().parent.parent / "saves"
+# Most recent log entries kept in memory for /log (the CSV file keeps the full history)
+LOG_IN_MEMORY = 2048
+
+
+# Directories already created by this process (skips a mkdir syscall per log file / save)
+_created_dirs: set[Path] = set()
+
+
+def _open_for_write(path: Path, mode: str = "w", **kwargs: Any):
+    """open(path, mode) creating its directory once; recreates it if removed meanwhile."""
+    directory = path.parent
+    if directory not in _created_dirs:
+        directory.mkdir(parents=True, exist_ok=True)
+        _created_dirs.add(directory)
+    try:
+        return open(path, mode, **kwargs)
+    except FileNotFoundError:
+        directory.mkdir(parents=True, exist_ok=True)
+        return open(path, mode, **kwargs)
+
+
+_INT_GRID_CHARS = frozenset("0123456789-,[]")
+
+
+def dump_board(board: Any) -> str:
+    """
+    JSON for a board in logs, byte-identical to json.dumps(board, ensure_ascii=False).
+
+    orjson has no separator option, so its compact output is only used (with
+    ", " re-inserted) for plain integer grids; anything else goes through json.
+    """
+    if orjson is not None:
+        try:
+            out = orjson.dumps(board).decode()
+        except TypeError:  # e.g. ints beyond 64 bits
+            out = None
+        if out is not None and _INT_GRID_CHARS.issuperset(out):
+            return out.replace(",", ", ")
+    return json.dumps(board, ensure_ascii=False)
 
 
 class BaseGame(ABC):
@@ -30,7 +76,8 @@ class BaseGame(ABC):
     Built-in logging:
       - _log / _steps / _start_time are managed automatically.
       - Subclasses call self._record_log(action, state) after each action.
-      - get_log_info() returns {log, steps, elapsed_seconds}.
+      - get_log_info() returns {log, steps, elapsed_seconds}; log holds the
+        latest LOG_IN_MEMORY entries (optionally only the last `tail`).
       - Every game session writes to logs/<game>/<session_id>.csv (CSV format)
       - Log file is created lazily on first log entry (avoids empty files)
       - CSV format: step, time, action, score, game_over, board (board stored as JSON string)
@@ -43,6 +90,14 @@ class BaseGame(ABC):
     _session_id: str | None = None
     # Player name associated with this session
     _player_name: str | None = None
+    # Buffered log rows are flushed every N entries, once they are LOG_FLUSH_INTERVAL
+    # seconds old, on game over and on close (app.py closes every session at exit)
+    LOG_FLUSH_EVERY: int = 16
+    LOG_FLUSH_INTERVAL: float = 5.0
+    # CSV header; subclasses adding columns also override _log_row()
+    LOG_COLUMNS: tuple[str, ...] = (
+        "step", "timestamp", "time", "game", "player", "difficulty", "action", "score", "game_over", "board",
+    )
 
     # ── Log internals ───────────────────────────────────────────────
 
@@ -56,53 +111,64 @@ class BaseGame(ABC):
 
     def _reset_log(self) -> None:
         """Initialise (or reset) the in-memory log. Log file is created lazily on first write."""
-        self._log: list[dict[str, Any]] = []
+        self._log: deque[dict[str, Any]] = deque(maxlen=LOG_IN_MEMORY)
         self._steps: int = 0
-        self._start_time: float | None = None
+        self._start_time: float | None = None  # time.monotonic() of the first entry
 
         # Close previous log file if open
-        if hasattr(self, "_log_file") and self._log_file is not None:
+        self.close_log()
+
+        # Increment round counter so each game gets a unique log file
+        if not hasattr(self, "_round"):
+            self._round = 0
+        self._round += 1
+
+    def close_log(self) -> None:
+        """Close the session's log file, if one is open."""
+        if getattr(self, "_log_file", None) is not None:
             try:
                 self._log_file.close()
             except Exception:
                 pass
         self._log_file = None
+        self._csv_writer = None
         self._log_path = None
 
-        # Increment round counter so each game gets a unique log file
-        if not hasattr(self, "_round"):
-            self._round = 0
-        self._round += 1
-
     def _ensure_log_file(self) -> None:
         """Create log file if it doesn't exist yet. Called lazily on first log entry."""
         if self._log_file is not None:
             return
         
-        if not self._session_id:
-            # Fallback to timestamp if session_id not set (shouldn't happen in normal flow)
-            ts = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-            log_filename = f"{ts}.csv"
-        else:
-            # Use session_id as filename (sanitize for filesystem)
-            # Replace characters that might be problematic in filenames
-            safe_session_id = self._session_id.replace("/", "_").replace("\\", "_")
-            rd = getattr(self, "_round", 1)
-            log_filename = f"{safe_session_id}_r{rd}.csv"
-        
         player = (self._player_name or "unknown").replace("/", "_").replace("\\", "_")
-        game_log_dir = LOG_DIR / self.name / player
-        game_log_dir.mkdir(parents=True, exist_ok=True)
-        self._log_path = game_log_dir / log_filename
-        self._log_file = open(self._log_path, "w", encoding="utf-8", newline="")
+        while True:
+            if not self._session_id:
+                # Fallback to timestamp if session_id not set (shouldn't happen in normal flow)
+                ts = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+                log_filename = f"{ts}.csv"
+            else:
+                # Use session_id as filename (sanitize for filesystem)
+                # Replace characters that might be problematic in filenames
+                safe_session_id = self._session_id.replace("/", "_").replace("\\", "_")
+                rd = getattr(self, "_round", 1)
+                log_filename = f"{safe_session_id}_r{rd}.csv"
+
+            self._log_path = LOG_DIR / self.name / player / log_filename
+            try:
+                # Never truncate an existing log (e.g. a session re-created after eviction
+                # starts again at round 1): move on to the next free round instead
+                self._log_file = _open_for_write(self._log_path, "x", encoding="utf-8", newline="")
+                break
+            except FileExistsError:
+                self._round = getattr(self, "_round", 1) + 1
         
-        # Write CSV header
-        writer = csv.writer(self._log_file)
-        writer.writerow(["step", "timestamp", "time", "game", "player", "difficulty", "action", "score", "game_over", "board"])
+        # Write CSV header (the writer is reused for every entry)
+        self._csv_writer = csv.writer(self._log_file)
+        self._csv_writer.writerow(self.LOG_COLUMNS)
+        self._last_flush = time.monotonic()
 
     def _record_log(self, action: str, state: dict[str, Any]) -> None:
-        """Append one log entry to memory and flush to disk."""
-        now = time.time()
+        """Append one log entry to memory and to the CSV file."""
+        now = time.monotonic()
         if self._start_time is None:
             self._start_time = now
 
@@ -122,33 +188,45 @@ class BaseGame(ABC):
 
         # Write to CSV file
         if self._log_file is not None:
-            writer = csv.writer(self._log_file)
-            # Convert board to JSON string for CSV storage
-            board_str = json.dumps(entry["board"], ensure_ascii=False) if entry["board"] else ""
-            difficulty = getattr(self, "difficulty", "")
-            writer.writerow([
-                entry["step"],
-                datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                entry["time"],
-                self.name,
-                self._player_name or "",
-                difficulty,
-                entry["action"],
-                entry["score"],
-                entry["game_over"],
-                board_str
-            ])
+            self._csv_writer.writerow(self._log_row(entry))
+            self._maybe_flush_log(entry["game_over"], now)
+
+    def _log_row(self, entry: dict[str, Any]) -> list[Any]:
+        """CSV row for one log entry, in LOG_COLUMNS order."""
+        # Convert board to JSON string for CSV storage
+        board_str = dump_board(entry["board"]) if entry["board"] else ""
+        return [
+            entry["step"],
+            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            entry["time"],
+            self.name,
+            self._player_name or "",
+            getattr(self, "difficulty", ""),
+            entry["action"],
+            entry["score"],
+            entry["game_over"],
+            board_str,
+        ]
+
+    def _maybe_flush_log(self, game_over: bool, now: float) -> None:
+        """Flush buffered log rows every LOG_FLUSH_EVERY entries or LOG_FLUSH_INTERVAL seconds, and at game over."""
+        if (game_over or self._steps % self.LOG_FLUSH_EVERY == 0
+                or now - self._last_flush >= self.LOG_FLUSH_INTERVAL):
             self._log_file.flush()
+            self._last_flush = now
 
-    def get_log_info(self) -> dict[str, Any]:
-        """Return log metadata for the API response."""
+    def get_log_info(self, tail: int | None = None) -> dict[str, Any]:
+        """Return log metadata for the API response (only the last *tail* entries if given)."""
         elapsed = 0.0
         if self._start_time is not None:
-            elapsed = round(time.time() - self._start_time, 2)
+            elapsed = round(time.monotonic() - self._start_time, 2)
+        entries = self._log
+        if tail is not None:
+            entries = itertools.islice(entries, max(0, len(entries) - tail), None)
         return {
             "steps": self._steps,
             "elapsed_seconds": elapsed,
-            "log": list(self._log),
+            "log": list(entries),
         }
 
     def get_metrics(self) -> dict[str, Any]:
@@ -182,12 +260,11 @@ class BaseGame(ABC):
         """Save current game state to disk for later resumption."""
         if not self._player_name or not self.name:
             return
-        SAVE_DIR.mkdir(parents=True, exist_ok=True)
         safe_player = self._player_name.replace("/", "_").replace("\\", "_")
         save_path = SAVE_DIR / f"{safe_player}_{self.name}.json"
         data = self.serialize()
         data["game_over"] = getattr(self, "game_over", False)
-        with open(save_path, "w", encoding="utf-8") as f:
+        with _open_for_write(save_path, encoding="utf-8") as f:
             json.dump(data, f, ensure_ascii=False)
 
     @staticmethod
@@ -2,21 +2,125 @@
 
 from __future__ import annotations
 
-import csv
-import json
 import random
-from copy import deepcopy
-from typing import Any, List, Tuple
+from array import array
+from typing import Any
 
 from .base import BaseGame
 
 GRID_SIZE = 4
+DIRECTIONS = ("up", "down", "left", "right")
 
 VALID_DIFFICULTIES = {"easy", "medium", "hard"}
 
 # Probability of spawning a "4" tile (vs "2") per difficulty
 FOUR_PROB = {"easy": 0.0, "medium": 0.1, "hard": 0.5}
 
+# ── Bitboard ────────────────────────────────────────────────────────
+# The whole board is one int: cell (r, c) holds log2(value) (0 = empty) in the
+# nibble at bit 4 * (4 * r + c), so row r is the 16-bit word at bit 16 * r.
+# Sliding a row is a lookup in tables built once for all 65536 rows;
+# up/down transpose the board, slide left/right, and transpose back.
+
+ROW_MASK = 0xFFFF
+MAX_EXP = 15  # a nibble holds tiles up to 32768 (two of those do not merge)
+MAX_TILE = 1 << MAX_EXP
+WIN_EXP = 11  # 2048
+
+
+def _reverse_row(row: int) -> int:
+    return ((row & 0xF) << 12) | ((row & 0xF0) << 4) | ((row >> 4) & 0xF0) | (row >> 12)
+
+
+def _slide_row_left(row: int) -> tuple[int, int, bool]:
+    """Slide and merge one packed row to the left. Return (new_row, gained_score, made_2048)."""
+    tiles = [e for e in ((row >> (4 * i)) & 0xF for i in range(GRID_SIZE)) if e]
+    merged: list[int] = []
+    gained = 0
+    made_2048 = False
+    i = 0
+    while i < len(tiles):
+        e = tiles[i]
+        if i + 1 < len(tiles) and tiles[i + 1] == e and e < MAX_EXP:
+            e += 1
+            gained += 1 << e
+            made_2048 = made_2048 or e == WIN_EXP
+            i += 2
+        else:
+            i += 1
+        merged.append(e)
+    new_row = 0
+    for i, e in enumerate(merged):
+        new_row |= e << (4 * i)
+    return new_row, gained, made_2048
+
+
+def _build_tables() -> tuple[tuple[array, array, bytearray], tuple[array, array, bytearray]]:
+    """(rows, scores, made_2048) lookup tables for sliding left and right."""
+    left, right = array("H", bytes(2 << 16)), array("H", bytes(2 << 16))
+    left_score, right_score = array("I", bytes(4 << 16)), array("I", bytes(4 << 16))
+    left_win, right_win = bytearray(1 << 16), bytearray(1 << 16)
+    for row in range(1 << 16):
+        new_row, gained, made_2048 = _slide_row_left(row)
+        rev = _reverse_row(row)
+        left[row], left_score[row], left_win[row] = new_row, gained, made_2048
+        right[rev], right_score[rev], right_win[rev] = _reverse_row(new_row), gained, made_2048
+    return (left, left_score, left_win), (right, right_score, right_win)
+
+
+_LEFT, _RIGHT = _build_tables()
+# direction -> (transpose first?, slide tables)
+_SHIFTS = {"left": (False, _LEFT), "right": (False, _RIGHT), "up": (True, _LEFT), "down": (True, _RIGHT)}
+
+# row -> 4-bit mask of its empty cells; _EMPTY_CELLS[r][mask] -> their flat indices in row r
+_BYTE_EMPTY = [(not b & 0xF) | (not b >> 4) << 1 for b in range(256)]
+_EMPTY_MASK = array("B", (_BYTE_EMPTY[row & 0xFF] | _BYTE_EMPTY[row >> 8] << 2 for row in range(1 << 16)))
+_EMPTY_CELLS = tuple(
+    tuple(tuple(GRID_SIZE * r + c for c in range(GRID_SIZE) if mask >> c & 1) for mask in range(16))
+    for r in range(GRID_SIZE)
+)
+
+
+def _transpose(x: int) -> int:
+    """Transpose the 4x4 nibble matrix."""
+    a1 = x & 0xF0F00F0FF0F00F0F
+    a2 = x & 0x0000F0F00000F0F0
+    a3 = x & 0x0F0F00000F0F0000
+    a = a1 | (a2 << 12) | (a3 >> 12)
+    b1 = a & 0xFF00FF0000FF00FF
+    b2 = a & 0x00FF00FF00000000
+    b3 = a & 0x00000000FF00FF00
+    return b1 | (b2 >> 24) | (b3 << 24)
+
+
+def _shift(state: int, direction: str) -> tuple[int, int, bool]:
+    """Slide the whole board. Return (new_state, gained_score, made_2048)."""
+    transpose, (rows, scores, wins) = _SHIFTS[direction]
+    if transpose:
+        state = _transpose(state)
+    new_state = gained = 0
+    made_2048 = False
+    for shift in (0, 16, 32, 48):
+        row = (state >> shift) & ROW_MASK
+        new_state |= rows[row] << shift
+        gained += scores[row]
+        made_2048 = made_2048 or wins[row]
+    if transpose:
+        new_state = _transpose(new_state)
+    return new_state, gained, bool(made_2048)
+
+
+def _can_shift(state: int, direction: str) -> bool:
+    """Whether sliding in *direction* would change the board, stopping at the first row that does."""
+    transpose, (rows, _, _) = _SHIFTS[direction]
+    if transpose:
+        state = _transpose(state)
+    for shift in (0, 16, 32, 48):
+        row = (state >> shift) & ROW_MASK
+        if rows[row] != row:
+            return True
+    return False
+
 
 class Game2048(BaseGame):
     """Classic 2048 sliding-tile game."""
@@ -24,7 +128,10 @@ class Game2048(BaseGame):
     name = "2048"
 
     def __init__(self) -> None:
-        self.board: list[list[int]] = []
+        self._state: int = 0  # bitboard, see module comment
+        # valid_actions() result for the bitboard it was computed on
+        self._valid_key: int | None = None
+        self._valid_cache: list[str] = []
         self.score: int = 0
         self.game_over: bool = False
         self.won: bool = False
@@ -37,12 +144,34 @@ class Game2048(BaseGame):
         if difficulty in VALID_DIFFICULTIES:
             self.difficulty = difficulty
 
+    @property
+    def board(self) -> list[list[int]]:
+        """The board as a fresh 4x4 list of tile values (0 = empty)."""
+        state = self._state
+        return [
+            [(1 << e) if (e := (state >> (16 * r + 4 * c)) & 0xF) else 0 for c in range(GRID_SIZE)]
+            for r in range(GRID_SIZE)
+        ]
+
+    @board.setter
+    def board(self, board: list[list[int]]) -> None:
+        state = 0
+        for r, row in enumerate(board):
+            for c, value in enumerate(row):
+                if value:
+                    value = int(value)
+                    if value < 2 or value > MAX_TILE or value & (value - 1):
+                        raise ValueError(f"Invalid 2048 tile {value} at ({r}, {c}): "
+                                         f"expected a power of two from 2 to {MAX_TILE}")
+                    state |= (value.bit_length() - 1) << (16 * r + 4 * c)
+        self._state = state
+
     # ── BaseGame interface ──────────────────────────────────────────
 
     def get_state(self) -> dict[str, Any]:
         return {
             "game": self.name,
-            "board": deepcopy(self.board),
+            "board": self.board,
             "score": self.score,
             "game_over": self.game_over,
             "won": self.won,
@@ -76,7 +205,7 @@ class Game2048(BaseGame):
         return state
 
     def reset(self) -> dict[str, Any]:
-        self.board = [[0] * GRID_SIZE for _ in range(GRID_SIZE)]
+        self._state = 0
         self.score = 0
         self.game_over = False
         self.won = False
@@ -90,11 +219,11 @@ class Game2048(BaseGame):
     def valid_actions(self) -> list[str]:
         if self.game_over:
             return []
-        actions = []
-        for direction in ("up", "down", "left", "right"):
-            if self._can_move(direction):
-                actions.append(direction)
-        return actions
+        # apply_action asks up to three times per move (guard, game-over check, state)
+        if self._valid_key != self._state:
+            self._valid_cache = [d for d in DIRECTIONS if self._can_move(d)]
+            self._valid_key = self._state
+        return list(self._valid_cache)
     
     def get_rules(self) -> str:
         """Return the game rules description."""
@@ -109,6 +238,7 @@ GAMEPLAY:
 - When you slide, all tiles move as far as possible in that direction until they hit the edge or another tile.
 - If two tiles with the same number collide while moving, they merge into a single tile with double the value.
 - After each move, a new tile (either 2 or 4) appears in a random empty cell.
+- The largest possible tile is 32768; two 32768 tiles do not merge.
 
 AVAILABLE ACTIONS:
 You can choose one of four directions:
@@ -128,156 +258,54 @@ When the game is over, you cannot make any more moves. Your final score is the s
 
     # ── Log override (add max_tile column) ─────────────────────────
 
-    def _ensure_log_file(self) -> None:
-        if self._log_file is not None:
-            return
-        super()._ensure_log_file()
-        # Rewrite header with max_tile column
-        if self._log_file is not None:
-            self._log_file.seek(0)
-            self._log_file.truncate()
-            writer = csv.writer(self._log_file)
-            writer.writerow(["step", "timestamp", "time", "game", "player", "difficulty", "action", "score", "max_tile", "game_over", "board"])
-
-    def _record_log(self, action: str, state: dict[str, Any]) -> None:
-        import time as _time
-        now = _time.time()
-        if self._start_time is None:
-            self._start_time = now
-        self._steps += 1
-        entry = {
-            "step": self._steps,
-            "time": round(now - self._start_time, 2),
-            "action": action,
-            "score": state.get("score", 0),
-            "game_over": state.get("game_over", False),
-            "board": state.get("board"),
-        }
-        self._log.append(entry)
-        self._ensure_log_file()
-        if self._log_file is not None:
-            writer = csv.writer(self._log_file)
-            board_str = json.dumps(entry["board"], ensure_ascii=False) if entry["board"] else ""
-            from datetime import datetime as _dt
-            writer.writerow([
-                entry["step"],
-                _dt.now().strftime("%Y-%m-%d %H:%M:%S"),
-                entry["time"],
-                self.name,
-                self._player_name or "",
-                self.difficulty,
-                entry["action"],
-                entry["score"],
-                self.max_tile,
-                entry["game_over"],
-                board_str,
-            ])
-            self._log_file.flush()
+    LOG_COLUMNS = (
+        "step", "timestamp", "time", "game", "player", "difficulty", "action", "score", "max_tile", "game_over", "board",
+    )
+
+    def _log_row(self, entry: dict[str, Any]) -> list[Any]:
+        row = super()._log_row(entry)
+        row.insert(-2, self.max_tile)  # before game_over, board
+        return row
 
     # ── Internal helpers ────────────────────────────────────────────
 
     def _spawn_tile(self) -> None:
+        state = self._state
+        # Cells in row-major order, as the list-based board enumerated them
         empty = [
-            (r, c)
-            for r in range(GRID_SIZE)
-            for c in range(GRID_SIZE)
-            if self.board[r][c] == 0
+            *_EMPTY_CELLS[0][_EMPTY_MASK[state & ROW_MASK]],
+            *_EMPTY_CELLS[1][_EMPTY_MASK[(state >> 16) & ROW_MASK]],
+            *_EMPTY_CELLS[2][_EMPTY_MASK[(state >> 32) & ROW_MASK]],
+            *_EMPTY_CELLS[3][_EMPTY_MASK[state >> 48]],
         ]
         if not empty:
             return
-        r, c = random.choice(empty)
+        i = random.choice(empty)
         prob = FOUR_PROB.get(self.difficulty, 0.1)
-        self.board[r][c] = 4 if random.random() < prob else 2
+        self._state = state | ((2 if random.random() < prob else 1) << (4 * i))
 
     def _update_max_tile(self) -> None:
-        self.max_tile = max(
-            self.board[r][c]
-            for r in range(GRID_SIZE)
-            for c in range(GRID_SIZE)
-        )
-
-    def _compress(self, row: list[int]) -> tuple[list[int], int, bool]:
-        """Slide and merge a single row to the left. Return (new_row, gained_score, changed)."""
-        # Remove zeros
-        tiles = [v for v in row if v != 0]
-        new_row: list[int] = []
-        gained = 0
-        skip = False
-
-        for i in range(len(tiles)):
-            if skip:
-                skip = False
-                continue
-            if i + 1 < len(tiles) and tiles[i] == tiles[i + 1]:
-                merged = tiles[i] * 2
-                new_row.append(merged)
-                gained += merged
-                if merged == 2048:
-                    self.won = True
-                skip = True
-            else:
-                new_row.append(tiles[i])
-
-        # Pad with zeros
-        new_row.extend([0] * (GRID_SIZE - len(new_row)))
-        changed = new_row != row
-        return new_row, gained, changed
+        state = self._state
+        top = 0
+        while state:
+            top = max(top, state & 0xF)
+            state >>= 4
+        self.max_tile = 1 << top if top else 0
 
     def _move(self, direction: str) -> bool:
         """Apply a move and return whether the board changed."""
-        rotated = self._rotate_to_left(direction)
-        any_changed = False
-        score_gain = 0
-
-        new_board = []
-        for row in rotated:
-            new_row, gained, changed = self._compress(row)
-            new_board.append(new_row)
-            score_gain += gained
-            any_changed = any_changed or changed
-
-        if any_changed:
-            self.board = self._rotate_from_left(direction, new_board)
-            self.score += score_gain
-        return any_changed
+        new_state, gained, made_2048 = _shift(self._state, direction)
+        if new_state == self._state:
+            return False
+        self._state = new_state
+        self.score += gained
+        if made_2048:
+            self.won = True
+        return True
 
     def _can_move(self, direction: str) -> bool:
         """Check whether a move in *direction* would change the board."""
-        rotated = self._rotate_to_left(direction)
-        for row in rotated:
-            _, _, changed = self._compress(list(row))
-            if changed:
-                return True
-        return False
+        return _can_shift(self._state, direction)
 
     def _has_moves(self) -> bool:
-        return any(self._can_move(d) for d in ("up", "down", "left", "right"))
-
-    # ── Board rotation helpers (everything → left, then back) ──────
-
-    def _rotate_to_left(self, direction: str) -> list[list[int]]:
-        b = self.board
-        if direction == "left":
-            return [list(row) for row in b]
-        if direction == "right":
-            return [list(reversed(row)) for row in b]
-        if direction == "up":
-            return [list(b[r][c] for r in range(GRID_SIZE)) for c in range(GRID_SIZE)]
-        # down
-        return [list(b[r][c] for r in reversed(range(GRID_SIZE))) for c in range(GRID_SIZE)]
-
-    def _rotate_from_left(self, direction: str, board: list[list[int]]) -> list[list[int]]:
-        if direction == "left":
-            return board
-        if direction == "right":
-            return [list(reversed(row)) for row in board]
-        if direction == "up":
-            return [
-                [board[c][r] for c in range(GRID_SIZE)]
-                for r in range(GRID_SIZE)
-            ]
-        # down
-        return [
-            [board[c][GRID_SIZE - 1 - r] for c in range(GRID_SIZE)]
-            for r in range(GRID_SIZE)
-        ]
+        return bool(self.valid_actions())
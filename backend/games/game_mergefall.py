@@ -21,9 +21,12 @@ Rules:
 
 from __future__ import annotations
 
+import bisect
+import functools
+import itertools
 import math
 import random
-from copy import deepcopy
+import re
 from typing import Any, List, Tuple
 
 from .base import BaseGame
@@ -33,6 +36,8 @@ DEFAULT_HEIGHT = 6
 
 VALID_DIFFICULTIES = {"easy", "medium", "hard"}
 
+_DROP_RE = re.compile(r"(?:drop\s*)?(\d+)")
+
 # Difficulty controls tile sampling spread (higher = more random/harder)
 # temp_base: base temperature for distribution, small_penalty: weight for tiles <=8
 DIFF_PARAMS = {
@@ -42,6 +47,41 @@ DIFF_PARAMS = {
 }
 
 
+@functools.lru_cache(maxsize=None)
+def _next_tile_table(difficulty: str, M: int, last_tile: int) -> tuple[tuple[int, ...], tuple[float, ...], float]:
+    """
+    Next-tile distribution for a (capped) max tile M: (candidates, cumulative weights, total).
+
+    Depends only on its arguments, of which there are a few dozen combinations,
+    so each table is built once instead of on every drop.
+    """
+    dp = DIFF_PARAMS.get(difficulty, DIFF_PARAMS["easy"])
+    max_exp = M.bit_length() - 1
+    candidates = [1 << e for e in range(1, max_exp + 1)]
+
+    center_val = MergeFall._floor_pow2(max(4, M // 32))
+    center_exp = center_val.bit_length() - 1
+    temp = dp["temp_high"] if M >= 128 else dp["temp_base"]
+
+    weights: list[float] = []
+    for e, v in enumerate(candidates, start=1):
+        dist = abs(e - center_exp)
+        w = math.exp(-dist / temp)
+        if v <= 8:
+            w *= dp["small_pen"]
+        if M >= 64 and v == M // 2:
+            w *= dp["high_pen"]
+        if M >= 64 and v == M:
+            w *= dp["max_pen"]
+        # Hard mode: penalize repeating the same tile as last turn
+        if difficulty == "hard" and v == last_tile:
+            w *= 0.15
+        weights.append(w)
+
+    cumulative = list(itertools.accumulate(weights))
+    return tuple(candidates), tuple(cumulative), sum(weights)
+
+
 class MergeFall(BaseGame):
     """MergeFall – drop numbers, merge neighbors, chain combos."""
 
@@ -56,14 +96,17 @@ class MergeFall(BaseGame):
         self.width = int(width)
         self.visible_height = int(height)      # rows the player sees (6)
         self.height = self.visible_height + 1   # +1 overflow row at the top
+        self._drop_actions = tuple("drop %d" % c for c in range(self.width))
         self.rng = random.Random(seed)
         self.board: list[list[int]] = []
         self.score: int = 0
         self.game_over: bool = False
         self.next_tile: int = 2
         self.difficulty: str = "hard"
-        self._active_pos: Tuple[int, int] | None = None
+        self._active_pos: Tuple[int, int] | None = None  # tile being resolved (board holds plain values)
         self._last_tile: int = 0  # Track last spawned tile for anti-repeat
+        self._max_tile: int = 2  # Largest tile on the board (tiles only ever grow)
+        self._dirty_cols: set[int] = set()  # Columns with gaps left by absorbed tiles
         self._reset_log()
         self.reset()
 
@@ -76,12 +119,12 @@ class MergeFall(BaseGame):
     def get_state(self) -> dict[str, Any]:
         # Only expose the visible rows (skip the overflow row 0)
         visible_board = [
-            [abs(v) for v in self.board[r]]
+            self.board[r][:]
             for r in range(1, self.height)
         ]
         state = {
             "game": self.name,
-            "board": deepcopy(visible_board),
+            "board": visible_board,
             "width": self.width,
             "height": self.visible_height,
             "score": self.score,
@@ -108,6 +151,8 @@ class MergeFall(BaseGame):
         self._active_pos = None
         self._pre_merge_board = None
         self._drop_pos = None
+        self._max_tile = 2
+        self._dirty_cols = set()
         self._reset_log()
         self.next_tile = self._sample_next_tile()
         return self.get_state()
@@ -116,14 +161,15 @@ class MergeFall(BaseGame):
         if self.game_over:
             return []
         actions = []
+        top = self.board[1]
         for c in range(self.width):
-            if self.board[1][c] == 0:
+            if top[c] == 0:
                 # Column not full
-                actions.append("drop %d" % c)
+                actions.append(self._drop_actions[c])
             else:
                 # Column full — only valid if next_tile can merge with the top tile
-                if self.board[1][c] == self.next_tile:
-                    actions.append("drop %d" % c)
+                if top[c] == self.next_tile:
+                    actions.append(self._drop_actions[c])
         return actions
     
     def get_rules(self) -> str:
@@ -193,9 +239,8 @@ Note: Even if a column looks full, dropping into it might trigger merges that cl
         self._active_pos = (r, col)
 
         # Capture pre-merge board (after drop, before merge) for animation
-        # Finalize active marker so it shows as a positive number
         self._pre_merge_board = [
-            [abs(v) for v in self.board[row]]
+            self.board[row][:]
             for row in range(1, self.height)
         ]
         self._drop_pos = [r - 1, col] if r > 0 else [0, col]  # visible row index
@@ -223,11 +268,22 @@ Note: Even if a column looks full, dropping into it might trigger merges that cl
         self._drop_pos = None
         return state
 
+    def restore_state(self, saved_state: dict[str, Any]) -> None:
+        """Restore from saved state and re-derive the tracked max tile."""
+        super().restore_state(saved_state)
+        self._max_tile = self._scan_max_tile()
+        self._dirty_cols = set(range(self.width))
+
     # ── Action parsing ──────────────────────────────────────────────
 
-    def _parse_action_to_col(self, action: str) -> int | None:
-        if action.isdigit():
-            return int(action)
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def _parse_action_to_col(action: str) -> int | None:
+        # Results are cached (agents repeat the same few strings)
+        # Fast path for the usual forms: "3", "drop 3", "drop3"
+        m = _DROP_RE.fullmatch(action)
+        if m:
+            return int(m.group(1))
         if action.startswith("drop"):
             tail = action[4:].strip()
             if not tail:
@@ -246,7 +302,9 @@ Note: Even if a column looks full, dropping into it might trigger merges that cl
     def _drop_active_into_column(self, col: int, value: int) -> int:
         for r in range(self.height - 1, -1, -1):
             if self.board[r][col] == 0:
-                self.board[r][col] = -value  # negative = active marker
+                self.board[r][col] = value
+                if value > self._max_tile:
+                    self._max_tile = value
                 return r
         raise RuntimeError("Column should not be full.")
 
@@ -263,6 +321,7 @@ Note: Even if a column looks full, dropping into it might trigger merges that cl
         if self._active_pos is None:
             return 0
 
+        board = self.board
         total_score = 0
         while True:
             # Only let the active tile fall (not all tiles)
@@ -271,7 +330,7 @@ Note: Even if a column looks full, dropping into it might trigger merges that cl
                 break
 
             ar, ac = self._active_pos
-            v = abs(self.board[ar][ac])
+            v = board[ar][ac]
             if v == 0:
                 break
 
@@ -280,11 +339,14 @@ Note: Even if a column looks full, dropping into it might trigger merges that cl
                 break
 
             for nr, nc in neighbors:
-                self.board[nr][nc] = 0
+                board[nr][nc] = 0
+                self._dirty_cols.add(nc)
 
             n = 1 + len(neighbors)
-            new_v = v * (1 << self._ceil_log2(n))
-            self.board[ar][ac] = -new_v
+            new_v = v << (n - 1).bit_length()  # v * 2**ceil(log2(n)), n >= 2
+            board[ar][ac] = new_v
+            if new_v > self._max_tile:
+                self._max_tile = new_v
             total_score += new_v
 
         # Finalize active marker
@@ -319,24 +381,29 @@ Note: Even if a column looks full, dropping into it might trigger merges that cl
         """After active chain ends, apply gravity and check for merges.
         First check fallen tiles, then scan all tiles for adjacent same-value pairs.
         Repeat until stable."""
+        board = self.board
+        H, W = self.height, self.width
         total_score = 0
         while True:
-            before = [row[:] for row in self.board]
-            self._apply_gravity()
+            before = [row[:] for row in board]
+            moved_cols = self._apply_gravity()
 
             # Priority 1: check tiles that fell during gravity
             merged_any = False
-            for c in range(self.width):
-                for r in range(self.height - 1, -1, -1):
-                    v = abs(self.board[r][c])
+            for c in moved_cols:
+                for r in range(H - 1, -1, -1):
+                    v = board[r][c]
                     if v != 0 and before[r][c] == 0:
                         neighbors = self._same_value_neighbors(r, c, v)
                         if neighbors:
                             for nr, nc in neighbors:
-                                self.board[nr][nc] = 0
+                                board[nr][nc] = 0
+                                self._dirty_cols.add(nc)
                             n = 1 + len(neighbors)
-                            new_v = v * (1 << self._ceil_log2(n))
-                            self.board[r][c] = new_v
+                            new_v = v << (n - 1).bit_length()
+                            board[r][c] = new_v
+                            if new_v > self._max_tile:
+                                self._max_tile = new_v
                             total_score += new_v
                             merged_any = True
                             break
@@ -347,18 +414,31 @@ Note: Even if a column looks full, dropping into it might trigger merges that cl
                 continue
 
             # Priority 2: scan entire board for any adjacent same-value pair
-            for r in range(self.height - 1, -1, -1):
-                for c in range(self.width):
-                    v = self.board[r][c]
+            for r in range(H - 1, -1, -1):
+                row = board[r]
+                above = board[r - 1] if r > 0 else None
+                below = board[r + 1] if r + 1 < H else None
+                for c in range(W):
+                    v = row[c]
                     if v == 0:
                         continue
+                    if not (
+                        (c + 1 < W and row[c + 1] == v)
+                        or (c > 0 and row[c - 1] == v)
+                        or (below is not None and below[c] == v)
+                        or (above is not None and above[c] == v)
+                    ):
+                        continue
                     neighbors = self._same_value_neighbors(r, c, v)
                     if neighbors:
                         for nr, nc in neighbors:
-                            self.board[nr][nc] = 0
+                            board[nr][nc] = 0
+                            self._dirty_cols.add(nc)
                         n = 1 + len(neighbors)
-                        new_v = v * (1 << self._ceil_log2(n))
-                        self.board[r][c] = new_v
+                        new_v = v << (n - 1).bit_length()
+                        board[r][c] = new_v
+                        if new_v > self._max_tile:
+                            self._max_tile = new_v
                         total_score += new_v
                         merged_any = True
                         break
@@ -372,31 +452,47 @@ Note: Even if a column looks full, dropping into it might trigger merges that cl
     def _same_value_neighbors(
         self, r: int, c: int, target: int
     ) -> List[Tuple[int, int]]:
+        # Unrolled bounds checks in the same order as before (up, down, left, right)
+        board = self.board
+        row = board[r]
         out: List[Tuple[int, int]] = []
-        for nr, nc in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
-            if 0 <= nr < self.height and 0 <= nc < self.width:
-                if abs(self.board[nr][nc]) == target:
-                    out.append((nr, nc))
+        if r > 0 and board[r - 1][c] == target:
+            out.append((r - 1, c))
+        if r + 1 < self.height and board[r + 1][c] == target:
+            out.append((r + 1, c))
+        if c > 0 and row[c - 1] == target:
+            out.append((r, c - 1))
+        if c + 1 < self.width and row[c + 1] == target:
+            out.append((r, c + 1))
         return out
 
-    def _apply_gravity(self) -> None:
+    def _apply_gravity(self) -> list[int]:
+        """Let tiles fall in every column that has gaps. Return those columns, in order."""
+        # Compact each column in place: scan bottom-up, moving tiles down to the write cursor
+        # (the active tile, if any, is followed to where it lands)
+        board = self.board
+        H = self.height
+        ar, ac = self._active_pos if self._active_pos is not None else (-1, -1)
+        # Only columns that lost a tile can have gaps; the others are already settled
+        if ac >= 0:
+            self._dirty_cols.add(ac)
+        cols = sorted(self._dirty_cols)
+        self._dirty_cols.clear()
         new_active_pos = None
-        for c in range(self.width):
-            col_vals = [
-                self.board[r][c]
-                for r in range(self.height)
-                if self.board[r][c] != 0
-            ]
-            new_col = [0] * self.height
-            rr = self.height - 1
-            for val in reversed(col_vals):
-                new_col[rr] = val
-                if val < 0:
-                    new_active_pos = (rr, c)
-                rr -= 1
-            for r in range(self.height):
-                self.board[r][c] = new_col[r]
+        for c in cols:
+            write = H - 1
+            for r in range(H - 1, -1, -1):
+                val = board[r][c]
+                if val == 0:
+                    continue
+                if write != r:
+                    board[write][c] = val
+                    board[r][c] = 0
+                if r == ar and c == ac:
+                    new_active_pos = (write, c)
+                write -= 1
         self._active_pos = new_active_pos
+        return cols
 
     def _would_merge_on_drop(self, col: int, tile_value: int) -> bool:
         """Check if dropping tile_value into col would trigger a merge (without modifying board)."""
@@ -409,35 +505,30 @@ Note: Even if a column looks full, dropping into it might trigger merges that cl
         if land_row is None:
             return False
         # Check if any neighbor at that position has the same value
-        for nr, nc in ((land_row - 1, col), (land_row + 1, col), (land_row, col - 1), (land_row, col + 1)):
-            if 0 <= nr < self.height and 0 <= nc < self.width:
-                if abs(self.board[nr][nc]) == tile_value:
-                    return True
-        return False
+        return bool(self._same_value_neighbors(land_row, col, tile_value))
 
     def _finalize_active(self) -> None:
-        if self._active_pos is None:
-            return
-        r, c = self._active_pos
-        self.board[r][c] = abs(self.board[r][c])
         self._active_pos = None
 
     def _finalize_active_and_get_value(self) -> int:
         if self._active_pos is None:
             return 0
         r, c = self._active_pos
-        val = abs(self.board[r][c])
-        self.board[r][c] = val
+        val = self.board[r][c]
         self._active_pos = None
         return val
 
     # ── next_tile sampling ──────────────────────────────────────────
 
     def _current_max_tile(self) -> int:
+        # Maintained on every drop and merge; rescanned only after restore_state
+        return self._max_tile
+
+    def _scan_max_tile(self) -> int:
         m = 2
-        for r in range(self.height):
-            for c in range(self.width):
-                m = max(m, abs(self.board[r][c]))
+        for row in self.board:
+            for v in row:
+                m = max(m, v)
         return m
 
     @staticmethod
@@ -459,45 +550,13 @@ Note: Even if a column looks full, dropping into it might trigger merges that cl
         # Cap the max spawnable tile at 128
         M = min(M, 128)
 
-        max_exp = int(math.log2(M))
-        candidates = [1 << e for e in range(1, max_exp + 1)]
-
-        center_val = self._floor_pow2(max(4, M // 32))
-        center_exp = int(math.log2(center_val))
-        temp = dp["temp_high"] if M >= 128 else dp["temp_base"]
-
-        weights: list[float] = []
-        for v in candidates:
-            e = int(math.log2(v))
-            dist = abs(e - center_exp)
-            w = math.exp(-dist / temp)
-            if v <= 8:
-                w *= dp["small_pen"]
-            if M >= 64 and v == M // 2:
-                w *= dp["high_pen"]
-            if M >= 64 and v == M:
-                w *= dp["max_pen"]
-            # Hard mode: penalize repeating the same tile as last turn
-            if self.difficulty == "hard" and v == self._last_tile:
-                w *= 0.15
-            weights.append(w)
-
-        s = sum(weights)
-        if s <= 0:
+        # Only hard mode looks at the previous tile; key the others without it
+        last_tile = self._last_tile if self.difficulty == "hard" else 0
+        candidates, cumulative, total = _next_tile_table(self.difficulty, M, last_tile)
+        if total <= 0:
             return 2
-        x = self.rng.random() * s
-        cum = 0.0
-        for v, w in zip(candidates, weights):
-            cum += w
-            if x <= cum:
-                self._last_tile = v
-                return v
-        return candidates[-1]
-
-    # ── Math helper ─────────────────────────────────────────────────
-
-    @staticmethod
-    def _ceil_log2(n: int) -> int:
-        if n <= 1:
-            return 0
-        return (n - 1).bit_length()
+        i = bisect.bisect_left(cumulative, self.rng.random() * total)
+        if i == len(candidates):
+            return candidates[-1]
+        self._last_tile = candidates[i]
+        return candidates[i]
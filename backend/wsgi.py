@@ -0,0 +1,13 @@
+"""EvoPlay – WSGI entry point for production servers.
+
+    cd backend
+    gunicorn -w 1 -k gthread --threads 32 -b 0.0.0.0:5001 wsgi:app
+
+Use one worker process and scale with threads: game sessions live in process
+memory, so with several workers a session's requests would land on
+independent registries (see SessionStore in app.py).
+"""
+
+from app import app
+
+__all__ = ["app"]